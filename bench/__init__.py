@@ -0,0 +1,13 @@
+"""
+Benchmarky pre parse25.py.
+
+  generator     deterministicky generator programov SOL25 s nastavitelnou velkostou
+  harness       meranie jednotlivych faz parsera cez sady velkosti, odhad exponentu
+                skalovania a porovnanie s ulozenou baseline
+  bench_nesting cas parsovania, kontroly a XML podla hlbky vnorenia (az 100 000 urovni)
+  bench_parallel zrychlenie paralelneho parsovania tiel metod (--jobs) podla poctu procesov
+  bench_memory  pamat drzana AST, aj so zdielanymi uzlami (--share-nodes)
+  bench_formats zapis, velkost a nacitanie vystupu vo formatoch xml, json, jsonl a binary
+  bench_input   spicka RSS pri citani zo stdin, cez mmap (--input) a po blokoch
+  bench_serve   latencia servera --serve oproti startu noveho procesu
+"""
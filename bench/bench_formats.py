@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Porovnanie vystupnych formatov --format: cas zapisu, velkost vystupu a cas nacitania.
+
+Pre kazdu velkost sa vygeneruje program (bench/generator.py), raz sa sparsuje
+a potom sa meria zapis do pamate a nacitanie vystupu kazdeho formatu. XML sa
+nacitava cez xml.etree.ElementTree.fromstring, co vytvori iba strom elementov;
+kompaktne formaty sa nacitaju funkciami load_json(), load_jsonl() a load_binary()
+az po uzly AST (Program). Pred meranim sa overi, ze nacitany program dava rovnake
+XML ako povodny.
+
+Pouzitie: python3 bench/bench_formats.py [pocet_tried ...]
+"""
+import gc
+import io
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+DEFAULT_CLASSES = [25, 100, 400]
+REPEAT = 5
+# Format, funkcia zapisu do prudu a funkcia nacitania vystupu.
+FORMATS = (
+    ("xml", lambda p, out: parse25.build_xml(p.classes, p.description, out), ET.fromstring),
+    ("xml compact", lambda p, out: parse25.build_xml(p.classes, p.description, out, True), ET.fromstring),
+    ("json", lambda p, out: parse25.build_json(p.classes, p.description, out), parse25.load_json),
+    ("jsonl", lambda p, out: parse25.build_jsonl(p.classes, p.description, out), parse25.load_jsonl),
+    ("binary", lambda p, out: parse25.build_binary(p.classes, p.description, out), parse25.load_binary),
+)
+
+
+# Funkcia best_time() vrati najlepsi cas z REPEAT volani func() a vysledok posledneho.
+# Garbage collector je pocas merania vypnuty rovnako ako v module timeit.
+def best_time(func):
+    best = None
+    for _ in range(REPEAT):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+# Funkcia emit() zapise program funkciou write a vrati vystup ako bytes.
+def emit(write, program):
+    buf = io.BytesIO()
+    write(program, buf)
+    return buf.getvalue()
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_CLASSES
+    print(f"{'classes':>8} {'format':>12} {'bytes':>10} {'emit [ms]':>10} {'load [ms]':>10}")
+    for classes in sizes:
+        source = generate(classes=classes, methods=4, statements=10, depth=4)
+        program = parse25.parse_source(source)
+        reference = emit(FORMATS[1][1], program)
+        for name, write, load in FORMATS:
+            emit_time, data = best_time(lambda: emit(write, program))
+            load_time, loaded = best_time(lambda: load(data))
+            if isinstance(loaded, parse25.Program) and emit(FORMATS[1][1], loaded) != reference:
+                print(f"{name}: loaded program differs from the original", file=sys.stderr)
+                sys.exit(1)
+            print(f"{classes:>8} {name:>12} {len(data):>10} {emit_time * 1000:>10.2f} {load_time * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
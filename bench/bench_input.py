@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark spicky pamate podla sposobu citania vstupu.
+
+Vygeneruje velky program (bench/generator.py), zapise ho do suboru a spusti
+parse25.py trikrat: so vstupom zo stdin (sys.stdin.read), s --input SUBOR
+(mmap) a s --input - (citanie stdin po blokoch). Pre kazdy beh vypise cas
+a spicku RSS procesu (ru_maxrss z os.wait4) a pre porovnanie aj pamat, ktoru
+drzi samotny AST (tracemalloc v tomto procese).
+
+Pouzitie: python3 bench/bench_input.py [pocet_tried]
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+PARSER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "parse25.py")
+DEFAULT_CLASSES = 200
+MODES = {
+    "stdin": [],
+    "--input FILE": ["--input", None],
+    "--input -": ["--input", "-"],
+}
+
+
+# Funkcia peak_rss() spusti parser s parametrami args a vrati (cas, spicka RSS v bajtoch).
+def peak_rss(args, path):
+    args = [path if arg is None else arg for arg in args]
+    with open(path, "rb") as stdin:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, PARSER, "--compact"] + args,
+                                stdin=stdin, stdout=subprocess.DEVNULL)
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        sys.exit(f"parse25.py {' '.join(args)} failed with {proc.returncode}")
+    return elapsed, usage.ru_maxrss * 1024
+
+
+# Funkcia ast_size() vrati pamat drzanu AST programu source.
+def ast_size(source):
+    gc.collect()
+    tracemalloc.start()
+    program = parse25.parse_source(source)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del program
+    return size
+
+
+def main():
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CLASSES
+    source = generate(classes=classes, methods=20, statements=20, comment_density=1.0, string_length=40)
+    fd, path = tempfile.mkstemp(suffix=".sol25")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(source)
+    try:
+        # ru_maxrss dieta zdedi z rodica pri fork(), preto sa procesy spustia skor,
+        # nez tento proces sparsuje AST.
+        print(f"input size:      {len(source) / 1e6:.2f} MB")
+        for name, args in MODES.items():
+            elapsed, rss = peak_rss(args, path)
+            print(f"{name + ':':<16} {rss / 1e6:.2f} MB peak RSS, {elapsed:.2f} s")
+    finally:
+        os.unlink(path)
+    print(f"AST:             {ast_size(source) / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
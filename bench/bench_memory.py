@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark pamate AST.
+
+Vygeneruje program s velkym poctom sprav, sparsuje ho a cez tracemalloc
+zmeria pamat, ktoru drzi vysledny AST z uzlov so __slots__. Pre porovnanie
+zmeria aj ten isty strom prevedeny do povodnej reprezentacie zo slovnikov
+(vratane obalovych slovnikov argumentov s polozkou order).
+
+Potom porovna pamat programu zo parse_source() bez zdielania a so zdielanymi
+uzlami (share=True, --share-nodes) na korpuse: testy tests/*.in bez chyby,
+vystup generatora (bench/generator.py) a program s opakovanymi prikazmi vyssie.
+Pamat zdielaneho programu zahrna aj mnozinu Program.shared. Pred meranim sa
+overi, ze oba programy davaju rovnake XML.
+
+Pouzitie: python3 bench/bench_memory.py [pocet_prikazov]
+"""
+import gc
+import glob
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+DEFAULT_STATEMENTS = 20000
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+# Parametre generatora pre korpus zdielaneho AST.
+GENERATED = (
+    {"classes": 16, "methods": 4, "statements": 50, "depth": 3},
+    {"classes": 4, "methods": 2, "statements": 500, "depth": 6, "arity": 3},
+)
+
+
+def make_program(statements):
+    lines = ["class Main : Object {", "    run [|", "        x := 0."]
+    for i in range(statements):
+        lines.append("        x := (x plus: %d) max: (self value: 'abc' with: [:a | b := a.])." % i)
+    lines += ["    ]", "}"]
+    return "\n".join(lines) + "\n"
+
+
+# Prevod uzla do povodnej reprezentacie zo slovnikov.
+def to_dict(node):
+    if type(node) is parse25.Literal:
+        return {"type": "literal", "class": node.cls, "value": node.value}
+    if type(node) is parse25.Var:
+        return {"type": "var", "name": node.name}
+    if type(node) is parse25.Send:
+        args = [{"order": i, "expr": to_dict(a)} for i, a in enumerate(node.args, start=1)]
+        return {"type": "send", "selector": node.selector, "expr": to_dict(node.receiver), "args": args}
+    instructions = [{"type": "assign", "order": i, "var": instr.var, "expr": to_dict(instr.expr)}
+                    for i, instr in enumerate(node.instructions, start=1)]
+    return {"type": "block", "arity": node.arity, "parameters": list(node.parameters),
+            "instructions": instructions}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+# Funkcia corpus() vrati zoznam (meno, text) vstupov pre porovnanie zdielaneho AST.
+# Testy sa spoja do jedneho vstupu, lebo kazdy z nich je maly.
+def corpus(source):
+    tests = []
+    for path in sorted(glob.glob(os.path.join(TESTS_DIR, "*.in"))):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        try:
+            parse25.parse_source(text)
+        except parse25.ParseError:
+            continue
+        tests.append(text)
+    inputs = [(f"tests/*.in ({len(tests)})", tests)]
+    for params in GENERATED:
+        inputs.append(("generator " + " ".join(f"{k}={v}" for k, v in params.items()), [generate(**params)]))
+    inputs.append(("repeated statements", [source]))
+    return inputs
+
+
+# Funkcia xml() vrati kompaktne XML programov.
+def xml(programs):
+    buf = io.BytesIO()
+    for program in programs:
+        parse25.to_xml(program, buf, compact=True)
+    return buf.getvalue()
+
+
+# Funkcia shared_report() vypise pamat programov bez zdielania a so zdielanymi uzlami.
+def shared_report(source):
+    # Prvy beh so zdielanim importuje weakref; do merania nema patrit. Kratsi text ako
+    # SHARE_MIN_SIZE by sa parsoval bez zdielania.
+    parse25.parse_source(make_program(20), share=True)
+    print(f"{'input':<60} {'bytes':>10} {'plain [MB]':>11} {'shared [MB]':>12} {'reduction':>10}")
+    for name, texts in corpus(source):
+        plain, plain_size = measure(lambda: [parse25.parse_source(t) for t in texts])
+        shared, shared_size = measure(lambda: [parse25.parse_source(t, share=True) for t in texts])
+        if xml(plain) != xml(shared):
+            print(f"{name}: shared AST gives different XML", file=sys.stderr)
+            sys.exit(1)
+        del plain, shared
+        print(f"{name:<60} {sum(map(len, texts)):>10} {plain_size / 1e6:>11.3f} {shared_size / 1e6:>12.3f} "
+              f"{100 * (1 - shared_size / plain_size):>9.1f} %")
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STATEMENTS
+    source = make_program(statements)
+    program, slots_size = measure(lambda: parse25.Parser(source).parse_main())
+    block = program.classes[0].methods[0].block
+    _, dict_size = measure(lambda: to_dict(block))
+    print(f"statements:      {statements}")
+    print(f"input size:      {len(source) / 1e6:.2f} MB")
+    print(f"__slots__ AST:   {slots_size / 1e6:.2f} MB")
+    print(f"dict AST:        {dict_size / 1e6:.2f} MB")
+    print(f"reduction:       {100 * (1 - slots_size / dict_size):.1f} %")
+    print()
+    shared_report(source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark parsera, semantickej kontroly a generovania XML podla hlbky vnorenia.
+
+Generuje program s jedinym priradenim, ktoreho vyraz ma zadanu hlbku vnorenia
+sprav, zatvoriek a blokov (bench/generator.py s parametrom depth), a meria cas
+faz parse_main, semantic_check a build_xml (kompaktne XML, odsadenie by pri
+velkej hlbke rastlo kvadraticky). Vsetky fazy su iterativne, takze hlbka nie je
+obmedzena limitom rekurzie a cas na jednu uroven vnorenia ma zostat priblizne
+konstantny.
+
+Pouzitie: python3 bench/bench_nesting.py [hlbka ...]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+DEFAULT_DEPTHS = [12500, 25000, 50000, 100000]
+REPEAT = 3
+PHASES = ("parse_main", "semantic_check", "build_xml")
+
+
+# Funkcia time_phases() vrati najlepsi cas kazdej fazy z REPEAT behov.
+def time_phases(source):
+    best = {}
+    for _ in range(REPEAT):
+        times = {}
+        start = time.perf_counter()
+        parser = parse25.Parser(source)
+        program = parser.parse_main()
+        times["parse_main"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser.check_main()
+        parse25.semantic_check(program.classes)
+        times["semantic_check"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse25.build_xml(program.classes, program.description, io.BytesIO(), compact=True)
+        times["build_xml"] = time.perf_counter() - start
+        for phase, elapsed in times.items():
+            best[phase] = min(best.get(phase, elapsed), elapsed)
+    return best
+
+
+def main():
+    depths = [int(a) for a in sys.argv[1:]] or DEFAULT_DEPTHS
+    print(f"{'depth':>8} {'bytes':>10} " + " ".join(f"{p + ' [ms]':>19} {'us/level':>9}" for p in PHASES))
+    for depth in depths:
+        source = generate(classes=0, methods=0, statements=1, depth=depth)
+        best = time_phases(source)
+        print(f"{depth:>8} {len(source):>10} "
+              + " ".join(f"{best[p] * 1000:>19.3f} {best[p] * 1e6 / depth:>9.2f}" for p in PHASES))
+
+
+if __name__ == "__main__":
+    main()
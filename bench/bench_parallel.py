@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Zrychlenie paralelneho parsovania tiel metod (parse_source s jobs > 1) podla poctu procesov.
+
+Vygeneruje program s dlhymi telami metod (bench/generator.py), zmeria sekvencne
+parsovanie a potom parse_source(text, jobs) pre kazdy pocet procesov; cas zahrna
+start procesov, prenos tiel aj zlucenie AST. Pred meranim sa overi, ze XML je
+zhodne so sekvencnym. Zrychlenie je ohranicene sekvencnou castou: prechodom
+struktury programu a dekodovanim vratenych tiel v hlavnom procese. parse_source()
+pouzije najviac tolko procesov, kolko je jadier, preto vacsie pocty meraju to iste.
+
+Pouzitie: python3 bench/bench_parallel.py [pocet_procesov ...]
+          (predvolene 1, 2, 4, ... az po pocet jadier)
+"""
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+REPEAT = 3
+PROGRAM = {"classes": 16, "methods": 4, "statements": 400, "depth": 3}
+
+
+# Funkcia best_time() vrati najlepsi cas z REPEAT volani parse_source(source, jobs) a XML.
+def best_time(source, jobs):
+    best = None
+    program = None
+    for _ in range(REPEAT):
+        program = None  # predchadzajuci strom by predlzoval prechody garbage collectora
+        gc.collect()
+        start = time.perf_counter()
+        program = parse25.parse_source(source, jobs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    buf = io.BytesIO()
+    parse25.build_xml(program.classes, program.description, buf, compact=True)
+    return best, buf.getvalue()
+
+
+# Funkcia default_jobs() vrati mocniny dvoch az po pocet jadier a pocet jadier.
+def default_jobs():
+    cores = parse25.available_cpus()
+    jobs = [1]
+    while jobs[-1] * 2 < cores:
+        jobs.append(jobs[-1] * 2)
+    if cores > 1:
+        jobs.append(cores)
+    return jobs
+
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or default_jobs()
+    source = generate(**PROGRAM)
+    sequential, reference = best_time(source, 1)
+    print(f"{len(source)} bytes, {parse25.available_cpus()} cores, sequential {sequential * 1000:.1f} ms")
+    print(f"{'jobs':>6} {'time [ms]':>10} {'speedup':>8}")
+    for jobs in counts:
+        elapsed, xml = best_time(source, jobs)
+        if xml != reference:
+            print(f"jobs {jobs}: output differs from the sequential parse", file=sys.stderr)
+            sys.exit(1)
+        print(f"{jobs:>6} {elapsed * 1000:>10.1f} {sequential / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
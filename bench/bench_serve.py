@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark latencie servera parse25.py --serve.
+
+Spusti server na docasnom Unix sockete a pre maly vygenerovany program
+porovna latenciu (p50, p99) troch sposobov volania:
+  daemon        poziadavka cez otvorene spojenie (bez startu procesu)
+  client spawn  novy proces parse25_client.py pre kazdu poziadavku
+  fresh spawn   novy proces python3 parse25.py pre kazdu poziadavku
+
+Pouzitie: python3 bench/bench_serve.py [pocet_poziadaviek]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import parse25_client  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+DEFAULT_REQUESTS = 200
+SPAWN_REQUESTS = 50
+STARTUP_TIMEOUT = 10.0
+
+
+# Funkcia percentile() vrati p-ty percentil zo zoradeneho zoznamu hodnot.
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    print(f"{name:>14} {len(samples):>8} {percentile(samples, 50) * 1000:>10.2f} "
+          f"{percentile(samples, 99) * 1000:>10.2f}")
+
+
+def time_spawns(cmd, source, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.run(cmd, input=source, stdout=subprocess.DEVNULL, check=False)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def wait_for_socket(path, server):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited with code %d" % server.returncode)
+        try:
+            return parse25_client.connect(path)
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start in time")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS
+    source = generate(classes=2, methods=3, statements=5).encode("utf-8")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "parse25.sock")
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "parse25.py"), "--serve", path,
+                                   "--workers", "1"])
+        try:
+            with wait_for_socket(path, server) as sock:
+                parse25_client.request(sock, source)
+                daemon = []
+                for _ in range(count):
+                    start = time.perf_counter()
+                    parse25_client.request(sock, source)
+                    daemon.append(time.perf_counter() - start)
+            spawns = min(count, SPAWN_REQUESTS)
+            client = time_spawns([sys.executable, os.path.join(ROOT, "parse25_client.py"), path], source, spawns)
+            fresh = time_spawns([sys.executable, os.path.join(ROOT, "parse25.py")], source, spawns)
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"input: {len(source)} bytes")
+    print(f"{'mode':>14} {'requests':>8} {'p50 [ms]':>10} {'p99 [ms]':>10}")
+    report("daemon", daemon)
+    report("client spawn", client)
+    report("fresh spawn", fresh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Deterministicky generator programov SOL25.
+
+Velkost programu sa nastavuje parametrami funkcie generate():
+  classes          pocet tried okrem triedy Main (tvoria retaz dedicnosti)
+  methods          pocet metod v kazdej triede
+  statements       pocet prikazov v tele kazdej metody
+  depth            hlbka vnorenia sprav vo vyrazoch
+  arity            pocet casti klucovych selektorov (argumentov sprav)
+  string_length    dlzka retazcovych literalov
+  comment_density  pravdepodobnost komentara pred prikazom (0.0 az 1.0)
+  seed             semienko generatora nahodnych cisel
+
+Rovnake parametre vzdy daju rovnaky text. Vygenerovane programy su
+syntakticky aj semanticky spravne.
+
+Pouzitie: python3 bench/generator.py [meno=hodnota ...] > program.sol25
+"""
+import random
+import sys
+
+STRING_ALPHABET = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJ0123456789<&>"
+COMMENT_WORDS = ["vypocet", "hodnota", "pomocna", "premenna", "blok", "sprava", "trieda"]
+DEFAULTS = {
+    "classes": 1,
+    "methods": 2,
+    "statements": 10,
+    "depth": 2,
+    "arity": 2,
+    "string_length": 8,
+    "comment_density": 0.0,
+    "seed": 0,
+}
+
+
+class _Generator:
+    def __init__(self, params):
+        self.p = params
+        self.rnd = random.Random(params["seed"])
+
+    def string_literal(self):
+        chars = [self.rnd.choice(STRING_ALPHABET) for _ in range(self.p["string_length"])]
+        return "'" + "".join(chars) + "'"
+
+    def atom(self, defined):
+        choice = self.rnd.randrange(6)
+        if choice == 0:
+            return str(self.rnd.randrange(-1000, 1000))
+        if choice == 1:
+            return self.string_literal()
+        if choice == 2:
+            return self.rnd.choice(("nil", "true", "false"))
+        if choice == 3:
+            return "(Integer from: %d)" % self.rnd.randrange(100)
+        return self.rnd.choice(defined)
+
+    def keyword_selector(self, arity):
+        return ["k%d:" % i for i in range(arity)]
+
+    # Vyraz s hlbkou vnorenia depth; jeden argument kazdej spravy je vnoreny,
+    # ostatne su atomy, takze velkost rastie s hlbkou linearne. Vyraz sa sklada
+    # zvnutra von bez rekurzie: kazda uroven prida predponu a priponu okolo
+    # vnutorneho vyrazu a text sa spoji az na konci.
+    def expr(self, depth, defined):
+        inner = self.atom(defined)
+        prefixes = []
+        suffixes = []
+        for _ in range(depth):
+            receiver = self.rnd.choice(defined)
+            kind = self.rnd.randrange(4)
+            if kind == 0:
+                prefixes.append("(")
+                suffixes.append(") m%d" % self.rnd.randrange(10))
+                continue
+            if kind == 1:
+                prefixes.append("%s value: [:p | q := p. r := (" % receiver)
+                suffixes.append(").]")
+                continue
+            parts = self.keyword_selector(self.p["arity"])
+            nested = self.rnd.randrange(len(parts))
+            args = [None if i == nested else self.atom(defined) for i in range(len(parts))]
+            before = "".join(" %s %s" % (sel, arg) for sel, arg in zip(parts[:nested], args[:nested]))
+            after = "".join(" %s %s" % (sel, arg) for sel, arg in zip(parts[nested + 1:], args[nested + 1:]))
+            prefixes.append("%s%s %s (" % (receiver, before, parts[nested]))
+            suffixes.append(")" + after)
+        return "".join(reversed(prefixes)) + inner + "".join(suffixes)
+
+    def comment(self):
+        words = [self.rnd.choice(COMMENT_WORDS) for _ in range(self.rnd.randrange(2, 8))]
+        return '"' + " ".join(words) + '"'
+
+    def block_body(self, params, indent):
+        defined = ["self"] + list(params)
+        lines = []
+        for i in range(self.p["statements"]):
+            if self.rnd.random() < self.p["comment_density"]:
+                lines.append(indent + self.comment())
+            var = "v%d" % i
+            lines.append("%s%s := %s." % (indent, var, self.expr(self.p["depth"], defined)))
+            defined.append(var)
+        return lines
+
+    def method(self, index):
+        if index % 2 == 0 or self.p["arity"] == 0:
+            selector, params = "m%d" % index, []
+        else:
+            parts = ["n%d" % index] + ["a%d" % i for i in range(1, self.p["arity"])]
+            selector = ":".join(parts) + ":"
+            params = ["x%d" % i for i in range(len(parts))]
+        header = " ".join(":" + name for name in params) + " |" if params else "|"
+        lines = ["    %s [%s" % (selector, header)]
+        lines += self.block_body(params, "        ")
+        lines.append("    ]")
+        return lines
+
+    def cls(self, name, parent, run):
+        lines = ["class %s : %s {" % (name, parent)]
+        if run:
+            lines.append('    run "vygenerovany program"')
+            lines.append("    [|")
+            lines += self.block_body([], "        ")
+            lines.append("    ]")
+        for j in range(self.p["methods"]):
+            lines += self.method(j)
+        lines.append("}")
+        return lines
+
+    def program(self):
+        lines = []
+        parent = "Object"
+        for i in range(self.p["classes"]):
+            name = "C%d" % i
+            lines += self.cls(name, parent, run=False)
+            parent = name
+        lines += self.cls("Main", parent, run=True)
+        return "\n".join(lines) + "\n"
+
+
+# Funkcia generate() vrati text programu SOL25 podla zadanych parametrov.
+def generate(**params):
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise TypeError("unknown generator parameters: " + ", ".join(sorted(unknown)))
+    merged = dict(DEFAULTS)
+    merged.update(params)
+    return _Generator(merged).program()
+
+
+def main():
+    params = {}
+    for arg in sys.argv[1:]:
+        name, _, value = arg.partition("=")
+        params[name] = float(value) if name == "comment_density" else int(value)
+    sys.stdout.write(generate(**params))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Meranie priepustnosti parsera po fazach.
+
+Pre kazdu sadu (sweep) sa vygeneruje niekolko programov rastucej velkosti
+(bench/generator.py) a zmeria sa cas faz:
+  parse_main      lexer a parser (Parser.parse_main)
+  semantic_check  Parser.check_main a semantic_check
+  build_xml       build_xml do pamate
+  serialization   zapis hotoveho XML do suboru
+
+Z casov sa metodou najmensich stvorcov na log-log skale odhadne exponent
+skalovania vzhladom na velkost vstupu, pri build_xml a serialization vzhladom
+na velkost vystupu (odsadenie XML rastie s hlbkou vnorenia), ak sa vystup
+v sade zvacsi aspon MIN_SPAN krat. Beh skonci s
+kodom 1, ak niektora faza skaluje superlinearne (exponent nad MAX_EXPONENT)
+alebo ak je cas na kilobajt pri najvacsej velkosti horsi ako baseline o viac
+ako TOLERANCE.
+
+Baseline (bench/baseline.json) zavisi od stroja; po zmene stroja alebo
+ocakavanej zmene vykonu ju treba obnovit cez --update-baseline.
+
+Pouzitie: python3 bench/harness.py [--sweep MENO ...] [--quick]
+                                   [--update-baseline] [--baseline SUBOR]
+"""
+import gc
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import parse25  # noqa: E402
+from bench.generator import generate  # noqa: E402
+
+PHASES = ("parse_main", "semantic_check", "build_xml", "serialization")
+# Fazy, ktorych praca zavisi od velkosti vystupu, nie vstupu.
+OUTPUT_PHASES = ("build_xml", "serialization")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MAX_EXPONENT = 1.3
+MIN_SPAN = 2.0
+TOLERANCE = 1.0
+REPEAT = 5
+
+# Sady: meneny parameter generatora, jeho hodnoty a pevne ostatne parametre.
+SWEEPS = {
+    "classes": ("classes", [25, 50, 100, 200], {"methods": 4, "statements": 5}),
+    "methods": ("methods", [25, 50, 100, 200], {"statements": 5}),
+    "statements": ("statements", [250, 500, 1000, 2000], {"methods": 1}),
+    "depth": ("depth", [25, 50, 100, 200], {"methods": 1, "statements": 5}),
+    "arity": ("arity", [4, 8, 16, 32], {"methods": 4, "statements": 50}),
+    "string_length": ("string_length", [250, 500, 1000, 2000], {"methods": 4, "statements": 100}),
+    "comments": ("statements", [250, 500, 1000, 2000], {"methods": 1, "comment_density": 1.0}),
+}
+
+
+# Funkcia time_phases() zmera jeden beh vsetkych faz nad textom source.
+def time_phases(source, tmp_path):
+    times = {}
+    start = time.perf_counter()
+    parser = parse25.Parser(source)
+    program = parser.parse_main()
+    times["parse_main"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parser.check_main()
+    parse25.semantic_check(program.classes)
+    times["semantic_check"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    buf = io.BytesIO()
+    parse25.build_xml(program.classes, program.description, buf)
+    times["build_xml"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(tmp_path, "wb") as f:
+        f.write(buf.getbuffer())
+    times["serialization"] = time.perf_counter() - start
+    return times, buf.getbuffer().nbytes
+
+
+# Funkcia best_times() vrati najlepsi cas kazdej fazy z REPEAT behov a velkost XML.
+# Garbage collector je pocas merania vypnuty rovnako ako v module timeit.
+def best_times(source, tmp_path):
+    best = {}
+    for _ in range(REPEAT):
+        gc.collect()
+        gc.disable()
+        try:
+            times, out_size = time_phases(source, tmp_path)
+        finally:
+            gc.enable()
+        for phase, elapsed in times.items():
+            best[phase] = min(best.get(phase, elapsed), elapsed)
+    return best, out_size
+
+
+# Funkcia fit_exponent() odhadne k v t ~ n^k (smernica priamky v log-log skale).
+def fit_exponent(sizes, times):
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mx = sum(xs) / len(xs)
+    my = sum(ys) / len(ys)
+    sxx = sum((x - mx) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+
+
+# Funkcia run_sweep() zmera jednu sadu a vrati {faza: {exponent, us_per_kb}}.
+def run_sweep(name, quick, tmp_path):
+    param, values, fixed = SWEEPS[name]
+    if quick:
+        values = [v // 4 or 1 for v in values]
+    sizes = []
+    out_sizes = []
+    samples = {phase: [] for phase in PHASES}
+    print(f"{name}:")
+    print(f"  {param:>15} {'bytes':>10} {'xml bytes':>10} " + " ".join(f"{p:>15}" for p in PHASES))
+    for value in values:
+        params = dict(fixed)
+        params[param] = value
+        source = generate(**params)
+        best, out_size = best_times(source, tmp_path)
+        sizes.append(len(source))
+        out_sizes.append(out_size)
+        for phase in PHASES:
+            samples[phase].append(best[phase])
+        print(f"  {value:>15} {len(source):>10} {out_size:>10} "
+              + " ".join(f"{best[p] * 1000:>12.3f} ms" for p in PHASES))
+    result = {}
+    for phase in PHASES:
+        basis = sizes
+        if phase in OUTPUT_PHASES and out_sizes[-1] >= MIN_SPAN * out_sizes[0]:
+            basis = out_sizes
+        result[phase] = {
+            "exponent": round(fit_exponent(basis, samples[phase]), 3),
+            "us_per_kb": round(samples[phase][-1] * 1e6 / (basis[-1] / 1024), 3),
+        }
+    print("  exponent:" + " " * 29 + " ".join(f"{result[p]['exponent']:>15.2f}" for p in PHASES))
+    return result
+
+
+# Funkcia check_results() vrati zoznam porusenych limitov.
+def check_results(results, baseline):
+    failures = []
+    for name, phases in results.items():
+        for phase, data in phases.items():
+            if data["exponent"] > MAX_EXPONENT:
+                failures.append(f"{name}/{phase}: superlinear scaling, exponent {data['exponent']:.2f}")
+            base = baseline.get(name, {}).get(phase)
+            if base and data["us_per_kb"] > base["us_per_kb"] * (1 + TOLERANCE):
+                failures.append(f"{name}/{phase}: {data['us_per_kb']:.1f} us/KB, "
+                                f"baseline {base['us_per_kb']:.1f} us/KB")
+    return failures
+
+
+def parse_harness_args(argv):
+    opts = {"sweeps": [], "quick": False, "update": False, "baseline": BASELINE_PATH}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--quick":
+            opts["quick"] = True
+        elif arg == "--update-baseline":
+            opts["update"] = True
+        elif arg in ("--sweep", "--baseline") and i + 1 < len(argv):
+            i += 1
+            if arg == "--baseline":
+                opts["baseline"] = argv[i]
+            elif argv[i] in SWEEPS:
+                opts["sweeps"].append(argv[i])
+            else:
+                print(f"unknown sweep {argv[i]}, choose from: {', '.join(SWEEPS)}", file=sys.stderr)
+                sys.exit(2)
+        else:
+            print(__doc__.strip())
+            sys.exit(2)
+        i += 1
+    opts["sweeps"] = opts["sweeps"] or list(SWEEPS)
+    return opts
+
+
+def main():
+    opts = parse_harness_args(sys.argv[1:])
+
+    baseline = {}
+    if os.path.exists(opts["baseline"]):
+        with open(opts["baseline"], "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        results = {name: run_sweep(name, opts["quick"], tmp_path) for name in opts["sweeps"]}
+    finally:
+        os.unlink(tmp_path)
+
+    if opts["update"]:
+        baseline.update(results)
+        with open(opts["baseline"], "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {opts['baseline']}")
+        return
+
+    # Pri --quick su velkosti mensie, cas na KB sa s baseline neporovnava.
+    failures = check_results(results, {} if opts["quick"] else baseline)
+    for failure in failures:
+        print("FAIL " + failure)
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
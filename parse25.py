@@ -1,31 +1,38 @@
 #!/usr/bin/env python3
+# Na zaciatku sa importuju iba moduly potrebne pri kazdom behu. Ostatne (asyncio,
+# concurrent.futures, json, hashlib, tempfile, ...) sa importuju az vo funkciach,
+# ktore ich pouzivaju, aby kratke behy neplatili ich import (test_parser.py
+# kontroluje rozpocet casu importu). Modul re sa importuje az pri zostaveni
+# tabulky regularnych vyrazov v patterns().
 import sys
-import re
+import os
+import io
+import time
+import bisect
+import functools
 from enum import Enum
-import xml.dom.minidom
-from xml.etree.ElementTree import Element, SubElement, tostring
 
 
 # Pomocna funkcia: Overuje, ci retazcovy literal obsahuje iba povolene escape sekvencie.
 # Povolene escape sekvencie su: \' a \\.
 # Ak spatne lomitko nie je nasledovane iba znakmi ' alebo \, alebo literal obsahuje skutocny znak noveho riadku,
-# alebo obsahuje retazec "\n", program skonci s chybovym kodom 21.
-def validate_string_literal(literal):
+# alebo obsahuje retazec "\n", vyvola ParseError s chybovym kodom 21 na pozicii (line, column).
+def validate_string_literal(literal, line=None, column=None):
     # Prejdeme literal znak po znaku
     i = 0
     while i < len(literal):
         # Overime, ci literal neobsahuje skutocny znak noveho riadku
         if literal[i] == "\n":
-            sys.exit(ErrorType.LEX_ERR_INPUT.value)
+            raise ParseError(ErrorType.LEX_ERR_INPUT, line, column)
         # Ak narazime na spatne lomitko
         if literal[i] == "\\":
             # Ak spatne lomitko je posledny znak, chyba
             if i + 1 >= len(literal):
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
+                raise ParseError(ErrorType.LEX_ERR_INPUT, line, column)
             next_char = literal[i + 1]
             # Povolene su iba escapovane apostrofy alebo escapovane spatne lomitka
             if next_char not in ["'", "\\"]:
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
+                raise ParseError(ErrorType.LEX_ERR_INPUT, line, column)
             # Preskocime nasledujuci znak, pretoze je castou escape sekvencie
             i += 2
         else:
@@ -36,6 +43,8 @@ def validate_string_literal(literal):
 class ErrorType(Enum):
     NO_ERROR = 0
     MISSING_PARAM = 10
+    INPUT_FILE = 11  # Chyba pri otvarani alebo citani vstupnych suborov
+    OUTPUT_FILE = 12  # Chyba pri otvarani alebo zapise vystupnych suborov
     LEX_ERR_INPUT = 21  # Lexikalna chyba vo vstupnom kode
     SYN_ERR_INPUT = 22  # Syntakticka chyba vo vstupnom kode
     SEM_IN_MAIN = 31  # Chyba: chybaju Main trieda alebo metoda run
@@ -43,6 +52,21 @@ class ErrorType(Enum):
     SEM_MISSMATCH = 33
     SEM_COLLISION = 34
     SEM_OTHER = 35
+    INTERNAL = 99  # Neocakavana chyba parsera
+
+
+# Vynimka ParseError nesie chybovy kod ErrorType a poziciu chyby vo zdrojovom texte
+# (riadok a stlpec od 1, alebo None, ak pozicia nie je znama).
+class ParseError(Exception):
+    def __init__(self, error, line=None, column=None):
+        self.error = error
+        self.code = error.value
+        self.line = line
+        self.column = column
+        where = ""
+        if line is not None:
+            where = f" on line {line}" if column is None else f" on line {line}, column {column}"
+        super().__init__(f"{error.name} ({error.value}){where}")
 
 
 # Funkcia show_help() vypise napovedu a skonci program.
@@ -50,724 +74,2832 @@ def show_help():
     print("Skript parse25.py parsuje zdrojovy kod jazyka SOL25 zo vstupu")
     print("a generuje XML reprezentaciu programu na vystup.")
     print("Pouzitie: python3 parse25.py < input_file > output_file")
+    print("          python3 parse25.py [--stats] [--profile FILE] [--jobs N] [--all-errors] [--share-nodes] < input_file > output_file")
+    print("          python3 parse25.py --input FILE|- [--compact] [--format FMT] > output_file")
+    print("          python3 parse25.py --serve SOCKET [--workers N] [--cache-dir DIR]")
+    print("          python3 parse25.py --batch DIR|GLOB|- [--workers N] [--chunksize N] [--out-dir DIR]")
     print("Parametre:")
-    print("  --help        Vypise tuto napovedu a skonci.")
+    print("  --help          Vypise tuto napovedu a skonci.")
+    print("  --compact       Vypise XML bez odsadenia a zalomeni riadkov (iba pri --format xml).")
+    print("  --input FILE    Cita vstup zo suboru FILE cez mmap (- cita stdin po blokoch); text")
+    print("                  kazdej triedy sa po jej spracovani uvolni z pamate.")
+    print("  --format FMT    Format vystupu: xml (predvolene), json, jsonl alebo binary; kompaktny")
+    print("                  zapis AST, ktory nacitaju load_json(), load_jsonl() a load_binary().")
+    print("  --jobs N        Tela metod dlhsie ako 16 KiB parsuje paralelne v N procesoch (najviac")
+    print("                  pocet jadier dostupnych procesu); vystup je rovnaky ako pri sekvencnom")
+    print("                  parsovani.")
+    print("  --all-errors    Pri chybe neskonci: pokracuje za dalsou '.', ']' alebo '}' a vypise")
+    print("                  na stderr JSON so vsetkymi chybami (kod, riadok, stlpec); navratovy")
+    print("                  kod je kod prvej chyby.")
+    print("  --share-nodes   Strukturne rovnake vyrazy v AST ulozi iba raz (setri pamat pri velkom,")
+    print("                  napr. generovanom kode); semanticka kontrola aj XML spracuju zdielany")
+    print("                  vyraz raz. Vstup kratsi ako 256 znakov sa spracuje bez zdielania.")
+    print("  --batch SPEC    Sparsuje vsetky subory z adresara (*.sol25, *.sol, *.in), podla vzoru GLOB")
+    print("                  alebo zo zoznamu ciest na stdin (-). Pre kazdy vstup zapise <meno>.xml")
+    print("                  a <meno>.rc a vypise suhrn s casmi spracovania; vstupy s rovnakym <meno>")
+    print("                  odmietne (kod 12).")
+    print("  --workers N     Pocet pracovnych procesov pre --batch a --serve (predvolene pocet")
+    print("                  jadier dostupnych procesu).")
+    print("  --chunksize N   Pocet suborov odovzdanych procesu naraz pre --batch.")
+    print("  --out-dir DIR   Adresar pre vystupy --batch (predvolene batch_out).")
+    print("  --cache-dir DIR Pouzije cache vysledkov v adresari DIR; nezmeneny vstup sa neparsuje.")
+    print("  --cache-size MB Horna hranica velkosti cache v MiB (predvolene 256), najdlhsie")
+    print("                  nepouzite zaznamy sa vymazu.")
+    print("  --watch PATH    Sleduje subor PATH a po kazdej zmene ho inkrementalne znova")
+    print("                  sparsuje; XML vypise na stdout, kod a cas na stderr.")
+    print("  --serve SOCKET  Spusti server na Unix sockete SOCKET, ktory parsuje poslane")
+    print("                  programy bez opakovaneho startu (klient: parse25_client.py).")
+    print("  --stats         Vypise na stderr JSON s casmi faz, spickou pamate a poctami")
+    print("                  riadkov, tried, metod, sprav, literalov a tokenov.")
+    print("  --profile FILE  Zapise profil behu: data cProfile, pri pripone .json")
+    print("                  udalosti faz vo formate Chrome trace.")
     sys.exit(ErrorType.NO_ERROR.value)
 
 
-# Trieda Parser obsahuje metody na lexikalnu a syntakticku analyzu vstupneho kodu.
-class Parser:
-    # Regularne vyrazy pre hlavicku triedy a hlavicku metody.
-    class_header_re = re.compile(r"^class\s+([A-Z][A-Za-z0-9]*)\s*(?::\s*([A-Z][A-Za-z0-9]*))?\s*\{(.*)$")
-    method_header_re = re.compile(r"^([a-z_][A-Za-z0-9_:]*)(?:\s+\"([^\"]+)\")?\s*$")
+# Uzly AST. Kazdy uzol ma __slots__, takze nema vlastny slovnik atributov;
+# druh uzla urcuje jeho trieda (type(node) is Send). Uzly vyrazov sa po vytvoreni
+# nemenia a slot __weakref__ im dovoluje byt v tabulke zdielanych uzlov (NodeTable).
+class Literal:
+    __slots__ = ("cls", "value", "__weakref__")
+
+    def __init__(self, cls, value):
+        self.cls = cls  # trieda literalu: Integer, String, Nil, True, False alebo class
+        self.value = value
+
+
+class Var:
+    __slots__ = ("name", "__weakref__")
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Send:
+    __slots__ = ("selector", "receiver", "args", "__weakref__")
+
+    def __init__(self, selector, receiver, args):
+        self.selector = selector
+        self.receiver = receiver
+        self.args = args  # zoznam vyrazov; poradie argumentu je index + 1
+
+
+class Block:
+    __slots__ = ("parameters", "instructions", "__weakref__")
+
+    def __init__(self, parameters, instructions):
+        self.parameters = parameters
+        self.instructions = instructions  # zoznam Assign; poradie prikazu je index + 1
+
+    @property
+    def arity(self):
+        return len(self.parameters)
+
+
+class Assign:
+    __slots__ = ("var", "expr")
+
+    def __init__(self, var, expr):
+        self.var = var
+        self.expr = expr
+
+
+class Method:
+    __slots__ = ("selector", "description", "block", "line")
+
+    def __init__(self, selector, description, block, line=None):
+        self.selector = selector
+        self.description = description
+        self.block = block
+        self.line = line  # riadok selektora; pouziva sa pri hlaseni semantickych chyb
+
+
+class Class:
+    __slots__ = ("name", "parent", "methods", "line")
+
+    def __init__(self, name, parent, methods, line=None):
+        self.name = name
+        self.parent = parent
+        self.methods = methods
+        self.line = line  # riadok hlavicky triedy
+
+
+class Program:
+    __slots__ = ("classes", "description", "shared")
+
+    def __init__(self, classes, description, shared=None):
+        self.classes = classes
+        self.description = description
+        self.shared = shared  # pri zdielanych uzloch mnozina uzlov s viac ako jednym rodicom
+
+
+# Trieda NodeTable vytvara zdielane uzly vyrazov (hash-consing): konstruktor vrati uz
+# existujuci strukturne rovnaky uzol, ak este zije, inak vytvori novy. Deti su v case
+# vytvorenia rodica uz zdielane, preto kluc obsahuje iba ich identitu (id); zivy uzol
+# drzi svoje deti, takze ich id sa pocas zivota kluca nemoze pouzit znova. Tabulka drzi
+# uzly slabo a uzol z nej zmizne spolu s poslednym programom, ktory ho pouziva.
+class NodeTable:
+    __slots__ = ("nodes",)
+
+    def __init__(self):
+        import weakref
+        self.nodes = weakref.WeakValueDictionary()
+
+    # Funkcia intern() vrati uzol pre kluc key; ak nezije, vytvori ho volanim make(*args).
+    def intern(self, key, make, *args):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = make(*args)
+        return node
+
+    def literal(self, cls, value):
+        return self.intern((Literal, cls, value), Literal, cls, value)
+
+    def var(self, name):
+        return self.intern((Var, name), Var, name)
+
+    def send(self, selector, receiver, args):
+        return self.intern((Send, selector, id(receiver), *map(id, args)), Send, selector, receiver, args)
+
+    def block(self, parameters, instructions):
+        key = (Block, tuple(parameters), *[(instr.var, id(instr.expr)) for instr in instructions])
+        return self.intern(key, Block, parameters, instructions)
+
+
+# Funkcia shared_nodes() vrati mnozinu uzlov vyrazov, ktore su v telach metod tried
+# classes dietatom viac ako jedneho rodica (alebo telom viacerych metod). Kazdy uzol
+# sa prejde iba raz, aj ked sa na neho odkazuje z viacerych miest.
+def shared_nodes(classes):
+    seen = set()
+    shared = set()
+    stack = [m.block for cls in classes for m in cls.methods]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            shared.add(node)
+            continue
+        seen.add(node)
+        node_type = type(node)
+        if node_type is Send:
+            stack.append(node.receiver)
+            stack.extend(node.args)
+        elif node_type is Block:
+            stack.extend(instr.expr for instr in node.instructions)
+    return shared
+
+
+# Druhy tokenov. Hodnota kazdeho druhu je zhodna s cislom skupiny v TOKEN_RE,
+# takze druh tokenu je priamo m.lastindex a token moze byt iba kompaktna n-tica.
+T_WS = 1
+T_COMMENT = 2
+T_STRING = 3
+T_INT = 4
+T_ASSIGN = 5
+T_KEYWORD = 6
+T_PARAM = 7
+T_ID = 8
+T_LPAREN = 9
+T_RPAREN = 10
+T_LBRACKET = 11
+T_RBRACKET = 12
+T_LBRACE = 13
+T_RBRACE = 14
+T_PIPE = 15
+T_DOT = 16
+T_COLON = 17
+T_ERROR = 18
+T_EOF = 0  # umely token za koncom vstupu
+
+# Jediny hlavny regularny vyraz lexera. Kazda alternativa je prave jedna skupina
+# v poradi podla konstant T_*; posledna alternativa zachyti kazdy neplatny znak.
+# Kompiluje sa s priznakmi VERBOSE, DOTALL a ASCII (\s a \d len pre ASCII znaky, rovnako
+# pre text aj pre bajty z mmap v ByteSource).
+TOKEN_PATTERN = r"""
+    (\s+)                               # biele znaky
+  | ("[^"]*")                           # komentar (moze byt aj viacriadkovy)
+  | ('(?:[^'\\]|\\.)*')                 # retazcovy literal
+  | ([+-]?\d+(?![A-Za-z0-9_]))          # cele cislo
+  | (:=)                                # priradenie
+  | ([A-Za-z_][A-Za-z0-9_]*:(?!=))      # cast klucoveho selektora, napr. from:
+  | (:[A-Za-z_][A-Za-z0-9_]*)           # parameter bloku, napr. :x
+  | ([A-Za-z_][A-Za-z0-9_]*)            # identifikator
+  | (\() | (\)) | (\[) | (\]) | (\{) | (\}) | (\|) | (\.) | (:)
+  | (.)                                 # neplatny znak
+"""
+
+CLASS_NAME_PATTERN = r"[A-Z][A-Za-z0-9]*"
+VAR_NAME_PATTERN = r"[a-z_][A-Za-z0-9]*"
+METHOD_SELECTOR_PATTERN = r"[a-z_][A-Za-z0-9_:]*"
+KEYWORD_PART_PATTERN = r"[A-Za-z0-9]+:"
+# Vyraz predbezneho prechodu: retazce a komentare (aby sa zatvorky v nich
+# nepocitali) a vsetky druhy zatvoriek.
+BRACKET_PATTERN = r"""'(?:[^'\\]|\\.)*'|"[^"]*"|[()\[\]{}]"""
+# Ten isty prechod iba pre hranate zatvorky; zatvorka je v skupine 1.
+BLOCK_BRACKET_PATTERN = r"""'(?:[^'\\]|\\.)*'|"[^"]*"|([\[\]])"""
+# Vyraz pre escape_attr(): znaky na nahradenie entitou, entity vlozene uz hotove
+# (zostavaju) a tri spatne lomitka pred &apos; (jedno sa vynecha).
+ATTR_ESCAPE_PATTERN = r"""\\\\\\&apos;|&(?:\#10;|nbsp;|apos;)|[&<>"]"""
+# Vyraz pre transform_description(): suvisly beh koncov riadkov (skutocnych aj \n).
+DESCRIPTION_BREAK_PATTERN = r"(?:\n|\\n|\x01)+"
+
+
+# Trieda PatternTable drzi vsetky skompilovane regularne vyrazy parsera.
+class PatternTable:
+    __slots__ = ("token", "token_bytes", "class_name", "var_name", "method_selector", "keyword_part", "brackets",
+                 "block_brackets", "attr_escape", "description_break")
+
+    def __init__(self):
+        import re
+        self.token = re.compile(TOKEN_PATTERN, re.VERBOSE | re.DOTALL | re.ASCII)
+        self.token_bytes = re.compile(TOKEN_PATTERN.encode("ascii"), re.VERBOSE | re.DOTALL)
+        self.class_name = re.compile(CLASS_NAME_PATTERN)
+        self.var_name = re.compile(VAR_NAME_PATTERN)
+        self.method_selector = re.compile(METHOD_SELECTOR_PATTERN)
+        self.keyword_part = re.compile(KEYWORD_PART_PATTERN)
+        self.brackets = re.compile(BRACKET_PATTERN)
+        self.block_brackets = re.compile(BLOCK_BRACKET_PATTERN)
+        self.attr_escape = re.compile(ATTR_ESCAPE_PATTERN)
+        self.description_break = re.compile(DESCRIPTION_BREAK_PATTERN)
+
+
+_patterns = None
+
+
+# Funkcia patterns() vrati tabulku regularnych vyrazov; pri prvom volani ju zostavi.
+def patterns():
+    global _patterns
+    if _patterns is None:
+        _patterns = PatternTable()
+    return _patterns
+
+
+# Funkcia lex() prejde vstup jedinym priechodom hlavneho regularneho vyrazu.
+# Je to generator tokenov; kazdy token je n-tica (druh, zaciatok, koniec, riadok),
+# kde zaciatok a koniec su offsety do povodneho textu. Biele znaky sa zahadzuju,
+# komentare sa pridavaju do zoznamu comments, aby ich parser nemusel preskakovat.
+# Parametre start, end a line obmedzia lexovanie na usek textu zacinajuci na riadku line.
+# So zoznamom errors lexer pri chybe neskonci: chybu prida do zoznamu a vrati chybny
+# token (T_ERROR). Parser na nom zlyha s chybou na tom istom mieste, ktoru resync()
+# nezaznamena, a preskoci zvysok prikazu, takze lexikalna chyba nema nasledne chyby.
+def lex(text, comments, start=0, end=None, line=1, errors=None):
+    if end is None:
+        end = len(text)
+    for m in patterns().token.finditer(text, start, end):
+        kind = m.lastindex
+        start, end = m.span()
+        if kind == T_WS:
+            line += text.count("\n", start, end)
+            continue
+        if kind == T_ERROR:
+            error = ParseError(ErrorType.LEX_ERR_INPUT, line, start - text.rfind("\n", 0, start))
+            if errors is None:
+                raise error
+            errors.append(error)
+            yield (kind, start, end, line)
+            continue
+        if kind == T_COMMENT:
+            comments.append((kind, start, end, line))
+            line += text.count("\n", start, end)
+            continue
+        yield (kind, start, end, line)
+        if kind == T_STRING:
+            line += text.count("\n", start, end)
+    yield (T_EOF, end, end, line)
 
-    def __init__(self, lines):
-        self.lines = lines  # zoznam vstupnych riadkov
-        self.index = 0  # aktualny index v zozname
+
+# Velkost bloku, po ktorom StreamSource cita vstup a MappedSource overuje UTF-8.
+SOURCE_CHUNK = 1 << 16
+
+
+# Funkcia decode_source() dekoduje bajty vstupu. Konce riadkov necha tak, ako su,
+# rovnako ako sys.stdin na Linuxe: '\r' zostane sucastou textu.
+def decode_source(data):
+    return data.decode("utf-8")
+
+
+# Funkcia count_newlines() vrati pocet znakov '\n' v buf[start:end] (mmap nema count()).
+def count_newlines(buf, start, end):
+    n = 0
+    i = buf.find(b"\n", start, end)
+    while i != -1:
+        n += 1
+        i = buf.find(b"\n", i + 1, end)
+    return n
+
+
+# Trieda ByteSource je vstup parsera citany po bajtoch, bez celeho textu v pamati.
+# Offsety tokenov su bajtove offsety od zaciatku vstupu, buf obsahuje bajty od offsetu
+# base. Parser ziska text tokenu cez src[a:b] a zaciatok riadku cez src.rfind("\n", ...)
+# rovnako ako pri retazci; stlpec chyby v znakoch vrati column(). Po uzavreti triedy
+# parser zavola release() a bajty pred danym offsetom sa uvolnia. Podtriedy:
+# MappedSource (subor cez mmap) a StreamSource (rura).
+class ByteSource:
+    def __init__(self, buf, eof):
+        self.buf = buf
+        self.base = 0
+        self.eof = eof  # True, ak buf uz siaha po koniec vstupu
+        self.last_newline = -1  # offset posledneho '\n' pred base
+        self.line_chars = 0  # pocet znakov medzi last_newline a base
+
+    def __getitem__(self, key):
+        return decode_source(self.buf[key.start - self.base:key.stop - self.base])
+
+    # Funkcia rfind() hlada iba '\n'; pred zaciatkom buf vrati posledny uvolneny koniec riadku.
+    def rfind(self, sub, start, end):
+        i = self.buf.rfind(sub.encode("ascii"), max(start - self.base, 0), end - self.base)
+        return self.last_newline if i == -1 else i + self.base
+
+    # Funkcia column() vrati stlpec (od 1) bajtoveho offsetu offset v znakoch, rovnaky
+    # ako pri citani toho isteho vstupu ako text.
+    def column(self, offset):
+        start = self.rfind("\n", 0, offset) + 1
+        chars = 0
+        if start < self.base:
+            chars = self.line_chars
+            start = self.base
+        return chars + len(self.buf[start - self.base:offset - self.base].decode("utf-8")) + 1
+
+    # Funkcia fill() nacita dalsie bajty do buf; na konci vstupu nastavi eof.
+    def fill(self):
+        self.eof = True
+
+    # Funkcia release() uvolni bajty pred offsetom offset.
+    def release(self, offset):
+        pass
+
+
+# Trieda MappedSource mapuje bezny subor cez mmap. Stranky uz spracovanej casti suboru
+# sa cez madvise(MADV_DONTNEED) vracaju systemu, takze sa nepocitaju do RSS procesu.
+class MappedSource(ByteSource):
+    def __init__(self, f):
+        import mmap
+        super().__init__(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), True)
+        self.released = 0  # zaciatok este neuvolnenej casti (zarovnany na stranku)
+        self.check_utf8()
+
+    # Funkcia check_utf8() overi kodovanie celeho suboru po blokoch; prejdene stranky hned uvolni.
+    def check_utf8(self):
+        import codecs
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for i in range(0, len(self.buf), SOURCE_CHUNK):
+                decoder.decode(self.buf[i:i + SOURCE_CHUNK])
+                self.drop_pages(i, i + SOURCE_CHUNK)
+            decoder.decode(b"", True)
+        except UnicodeDecodeError:
+            raise ParseError(ErrorType.INPUT_FILE) from None
+
+    # Funkcia drop_pages() vrati systemu cele stranky v intervale [start, end).
+    def drop_pages(self, start, end):
+        import mmap
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start += -start % mmap.PAGESIZE
+        end = min(end, len(self.buf))
+        end -= end % mmap.PAGESIZE
+        if end > start:
+            self.buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def release(self, offset):
+        if offset > self.released:
+            self.drop_pages(self.released, offset)
+            self.released = offset
+
+
+# Trieda StreamSource cita vstup, ktory sa neda namapovat (rura, stdin), po blokoch.
+# Buffer drzi iba neuvolnenu cast vstupu; blok sa zvacsuje s bufferom, aby aj velmi
+# dlha trieda stala linearny cas.
+class StreamSource(ByteSource):
+    def __init__(self, stream):
+        import codecs
+        super().__init__(b"", False)
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def fill(self):
+        chunk = self.stream.read(max(SOURCE_CHUNK, len(self.buf)))
+        try:
+            self.decoder.decode(chunk, not chunk)
+        except UnicodeDecodeError:
+            raise ParseError(ErrorType.INPUT_FILE) from None
+        if chunk:
+            self.buf += chunk
+        else:
+            self.eof = True
+
+    def release(self, offset):
+        k = offset - self.base
+        if k <= 0:
+            return
+        i = self.buf.rfind(b"\n", 0, k)
+        if i != -1:
+            self.last_newline = self.base + i
+            self.line_chars = 0
+        self.line_chars += len(self.buf[i + 1:k].decode("utf-8"))
+        self.buf = self.buf[k:]
+        self.base = offset
+
+
+# Funkcia lex_source() je obdoba lex() nad ByteSource. Token, ktory konci na konci
+# buffera (alebo neukonceny retazec), moze pokracovat v dalsom bloku, preto sa pred
+# jeho spracovanim nacitaju dalsie bajty. Ak parser medzi tokenmi uvolni cast vstupu,
+# lexovanie pokracuje v novom bufferi od rovnakeho offsetu.
+def lex_source(source, comments):
+    token_re = patterns().token_bytes
+    line = 1
+    pos = 0
+    while True:
+        buf = source.buf
+        base = source.base
+        more = not source.eof
+        for m in token_re.finditer(buf, pos - base):
+            kind = m.lastindex
+            start, end = m.span()
+            if more and (end == len(buf) or kind == T_ERROR and buf[start] in b"'\""):
+                break
+            pos = end + base
+            if kind == T_WS:
+                line += count_newlines(buf, start, end)
+                continue
+            if kind == T_ERROR:
+                raise ParseError(ErrorType.LEX_ERR_INPUT, line, source.column(start + base))
+            if kind == T_COMMENT:
+                comments.append((kind, start + base, pos, line))
+                line += count_newlines(buf, start, end)
+                continue
+            yield (kind, start + base, pos, line)
+            if kind == T_STRING:
+                line += count_newlines(buf, start, end)
+            if source.buf is not buf:
+                break
+        else:
+            if not more:
+                yield (T_EOF, pos, pos, line)
+                return
+        if source.buf is buf:
+            source.fill()
+
+
+# Trieda TokenReader je kurzor nad prudom tokenov s jednym miestom na vratenie tokenu.
+# Tokeny sa citaju z generatora postupne, takze sa nikdy neuklada cely zoznam tokenov
+# a peek() aj push_back() maju konstantnu cenu.
+class TokenReader:
+    def __init__(self, text, start=0, end=None, line=1, errors=None):
+        self.comments = []  # komentare nacitane lexerom doteraz
+        self.last = None  # posledny precitany token
+        self._text = text
+        self._end = end
+        self._errors = errors
+        if isinstance(text, ByteSource):
+            self._tokens = lex_source(text, self.comments)
+        else:
+            self._tokens = lex(text, self.comments, start, end, line, errors)
+        self._pushback = None  # token vrateny cez push_back() alebo nacitany cez peek()
+
+    # Funkcia seek() preskoci text a dalej cita tokeny od offsetu offset, ktory musi byt
+    # hranicou tokenu na riadku line. Komentare v preskocenom texte sa nezaznamenaju.
+    def seek(self, offset, line):
+        self._tokens = lex(self._text, self.comments, offset, self._end, line, self._errors)
+        self._pushback = None
+
+    # Funkcia peek() vrati aktualny token bez posunu kurzora.
+    def peek(self):
+        if self._pushback is None:
+            self._pushback = next(self._tokens)
+        return self._pushback
+
+    # Funkcia next() vrati aktualny token a posunie kurzor.
+    def next(self):
+        tok = self.peek()
+        if tok[0] != T_EOF:
+            self._pushback = None
+        self.last = tok
+        return tok
+
+    # Funkcia push_back() vrati posledny precitany token spat do prudu.
+    def push_back(self, tok):
+        if self._pushback is not None:
+            raise ValueError("pushback slot is already occupied")
+        self._pushback = tok
+
+    # Funkcia rewind() urobi z tokenu tok aktualny token, ak uz nim nie je.
+    def rewind(self, tok):
+        if self._pushback is not tok:
+            self.push_back(tok)
+
+
+# Funkcia transform_description() transformuje text popisu: osamoteny koniec riadku
+# (skutocny aj literalne "\n") nahradi &nbsp;, beh viacerych &#10; za kazdy z nich.
+# Znak U+0001 sa pocita ako koniec riadku.
+def transform_description(desc):
+    return patterns().description_break.sub(description_break, desc)
+
+
+# Funkcia description_break() vrati nahradu behu koncov riadkov z transform_description().
+def description_break(match):
+    run = match.group()
+    count = len(run) - run.count("\\")  # literal \n ma dva znaky, ostatne jeden
+    return "&nbsp;" if count == 1 else "&#10;" * count
+
+
+# Stavy iterativneho parsera v Parser.parse_block(): dalsi prikaz bloku, zaciatok
+# operandu, hotovy operand a hotovy vyraz.
+P_STATEMENT, P_OPERAND, P_OPERAND_DONE, P_EXPR_DONE = range(4)
+# Druhy ramcov na jeho zasobniku; zatvorka nema ziadny stav, preto staci jediny ramec.
+F_BLOCK, F_PAREN, F_SEND = range(3)
+PAREN_FRAME = (F_PAREN,)
+
+
+# Trieda Parser obsahuje metody na syntakticku analyzu prudu tokenov z funkcie lex().
+# Parametre start, end a line obmedzia parsovanie na usek textu (pouziva IncrementalParser).
+# So zoznamom errors parser pri chybe neskonci: chybu prida do zoznamu, preskoci tokeny
+# po najblizsiu '.' alebo ']' bloku, resp. ']' metody alebo '}' triedy a pokracuje.
+# S tabulkou nodes (NodeTable) vytvara zdielane uzly vyrazov.
+class Parser:
+    def __init__(self, source, start=0, end=None, line=1, errors=None, nodes=None):
+        self.src = source  # povodny text; tokeny do neho ukazuju offsetmi
+        self.patterns = patterns()
+        self.errors = errors  # zaznamenane chyby, alebo None, ak prva chyba parsovanie ukonci
+        self.handled = set()  # chyby, po ktorych uz resync() preskocil tokeny
+        self.nodes = nodes  # tabulka zdielanych uzlov, alebo None
+        # Konstruktory uzlov vyrazov: triedy uzlov, alebo metody tabulky nodes.
+        if nodes is None:
+            self.new_literal, self.new_var, self.new_send, self.new_block = Literal, Var, Send, Block
+        else:
+            self.new_literal, self.new_var, self.new_send, self.new_block = \
+                nodes.literal, nodes.var, nodes.send, nodes.block
+        self.reader = TokenReader(source, start, end, line, errors)
         self.classes = []  # zoznam parsovanych tried
         self.current_class = None  # aktualne spracovavana trieda
-        self.current_method = None  # aktualne spracovavana metoda
-        self.in_block = False  # ci sa spracovava telo bloku
-        self.block_params = []  # parametre bloku (zoznam retezcov bez dvojtych bodiek)
-        self.block_body_lines = []  # riadky tela bloku
-        self.program_description = None  # popis ulozeny z hlavicky metody run v triede Main
+        self.program_description = None  # popis programu z triedy Main
+        self.description_marks = []  # zatvaracie ']' metod triedy Main, za ktorymi moze byt popis
+        self.mark_description = None  # popis z prveho komentara za niektorou z description_marks
+        self.streaming = isinstance(source, ByteSource)  # text sa po kazdej triede uvolnuje
+        self.symbols = {}  # tabulka symbolov: text -> jediny zdielany retazec s tym textom
+        self.pool = None  # ProcessPoolExecutor pre tela metod pri parse_main_parallel()
+        self.brackets = None  # offset '[' -> offset jej ']' pri parse_main_parallel()
+        self.deferred = []  # dvojice (Method, future) s telami parsovanymi v pool
 
-    # Funkcia eof() vracia True, ak sme dosiahli koniec vstupnych riadkov.
+    # Funkcia eof() vracia True, ak sme dosiahli koniec prudu tokenov.
     def eof(self):
-        return self.index >= len(self.lines)
+        return self.reader.peek()[0] == T_EOF
 
-    # Funkcia get_line() vrati aktualny riadok.
-    def get_line(self):
-        if self.eof():
-            return None
-        return self.lines[self.index]
+    # Funkcia peek_kind() vrati druh aktualneho tokenu (T_EOF na konci vstupu).
+    def peek_kind(self):
+        return self.reader.peek()[0]
 
-    # Funkcia advance() posunie index o 1.
+    # Funkcia advance() vrati aktualny token a posunie kurzor o 1.
     def advance(self):
-        self.index += 1
+        tok = self.reader.next()
+        if tok[0] == T_EOF:
+            raise self.error(ErrorType.SYN_ERR_INPUT, tok)
+        return tok
 
-    # Funkcia remove_comments() odstrani komentarove casti (text medzi dvojitymi uvodzovkami)
-    # a zachova retazcove literaly v jednoduchych uvodzovkach.
-    def remove_comments(self, line):
-        result = ""
-        i = 0
-        in_single = False  # Sledovanie, ci sme vo vnutri retazcoveho literalu v jednoduchych uvodzovkach
-        while i < len(line):
-            ch = line[i]
-            if ch == "'" and not in_single:
-                in_single = True
-                result += ch
-                i += 1
-            elif ch == "'" and in_single:
-                in_single = False
-                result += ch
-                i += 1
-            elif not in_single and ch == '"':
-                j = i + 1
-                while j < len(line) and line[j] != '"':
-                    j += 1
-                if j >= len(line):
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                i = j + 1  # Preskocime komentarovu cast
-            else:
-                result += ch
-                i += 1
-        return result
+    # Funkcia expect() overi druh aktualneho tokenu a posunie sa za neho.
+    def expect(self, kind):
+        if self.peek_kind() != kind:
+            raise self.error(ErrorType.SYN_ERR_INPUT)
+        return self.advance()
 
-    # Funkcia extract_first_trailing_comment() extrahuje prvy trailing komentar zo vstupneho textu.
-    def extract_first_trailing_comment(self, text):
-        m = re.search(r'"([^"]*)"', text)
-        if not m:
-            return None
-        raw_comment = m.group(1)
-        return self.transform_description(raw_comment)
-
-    # Funkcia transform_description() transformuje text popisu: nahradi skutocne znaky noveho riadku
-    # a literalne "\n" specialnymi symbolmi.
-    def transform_description(self, desc):
-        desc = desc.replace('\n', '\u0001')
-        desc = desc.replace(r'\n', '\u0001')
-        out = []
-        i = 0
-        while i < len(desc):
-            if desc[i] == '\u0001':
-                start = i
-                while i < len(desc) and desc[i] == '\u0001':
-                    i += 1
-                count = i - start
-                if count == 1:
-                    out.append("&nbsp;")
-                else:
-                    out.append("&#10;" * count)
-            else:
-                out.append(desc[i])
-                i += 1
-        return "".join(out)
+    # Funkcia position() vrati dvojicu (riadok, stlpec) zaciatku tokenu tok.
+    def position(self, tok):
+        if isinstance(self.src, ByteSource):
+            return tok[3], self.src.column(tok[1])
+        return tok[3], tok[1] - self.src.rfind("\n", 0, tok[1])
+
+    # Funkcia error() vytvori ParseError s poziciou tokenu tok (predvolene aktualneho tokenu).
+    def error(self, error, tok=None):
+        if tok is None:
+            tok = self.reader.peek()
+        return ParseError(error, *self.position(tok))
+
+    # Funkcia text() vrati text tokenu z povodneho vstupu.
+    def text(self, tok):
+        return self.src[tok[1]:tok[2]]
 
-    # Funkcia strip_parentheses() odstrani vonkajsie zatvorky, ak su vyvazene.
-    def strip_parentheses(self, expr):
-        expr = expr.strip()
-        while expr.startswith("(") and expr.endswith(")") and self.check_balanced(expr[1:-1]):
-            expr = expr[1:-1].strip()
-        return expr
+    # Funkcia symbol() vrati zdielanu instanciu retazca text z tabulky symbolov parsera.
+    # Mena tried a premennych a selektory sa v programe mnohokrat opakuju; vdaka tabulke
+    # vsetky vyskyty v AST ukazuju na jeden retazec, ktory ma hash spocitany iba raz
+    # a porovnanie v semantickej kontrole skonci uz na zhode identity.
+    def symbol(self, text):
+        return self.symbols.setdefault(text, text)
 
-    # Funkcia check_balanced() kontroluje, ci su zatvorky vyvazene.
-    def check_balanced(self, s):
+    # Funkcia comment_before_next() vrati prvy komentar medzi tokenom tok a nasledujucim tokenom,
+    # alebo None.
+    def comment_before_next(self, tok):
+        self.reader.peek()
+        comments = self.reader.comments
+        i = len(comments)
+        while i > 0 and comments[i - 1][1] > tok[1]:
+            i -= 1
+        if i < len(comments):
+            return comments[i]
+        return None
+
+    # Funkcia comment_after() vrati prvy komentar, ktory zacina za offsetom offset
+    # na riadku line, alebo None.
+    def comment_after(self, offset, line):
+        comments = self.reader.comments
+        i = bisect.bisect_left(comments, offset, key=lambda c: c[1])
+        if i < len(comments) and comments[i][3] == line:
+            return comments[i]
+        return None
+
+    # Funkcia comment_text() vrati obsah komentara bez uvodzoviek.
+    def comment_text(self, comment):
+        return self.src[comment[1] + 1:comment[2] - 1]
+
+    # Funkcia parse_block_params() nacita parametre bloku az po znak '|' a vrati ich zoznam.
+    # Blok bez parametrov nemusi znak '|' obsahovat.
+    def parse_block_params(self):
+        params = []
+        while self.peek_kind() == T_PARAM:
+            params.append(self.symbol(self.text(self.advance())[1:]))
+        if self.peek_kind() == T_PIPE:
+            self.advance()
+        elif params:
+            raise self.error(ErrorType.SYN_ERR_INPUT)
+        return params
+
+    # Funkcia parse_literal() spracuje vyraz z jedineho tokenu.
+    def parse_literal(self, tok):
+        kind = tok[0]
+        value = self.text(tok)
+        if kind == T_INT:
+            return self.new_literal("Integer", value)
+        if kind == T_STRING:
+            value = value[1:-1]
+            validate_string_literal(value, *self.position(tok))
+            return self.new_literal("String", value)
+        if kind != T_ID:
+            raise self.error(ErrorType.SYN_ERR_INPUT, tok)
+        if value in ("nil", "true", "false"):
+            lit_class = {"nil": "Nil", "true": "True", "false": "False"}[value]
+            return self.new_literal(lit_class, value)
+        if value[0].isupper():
+            if not self.patterns.class_name.fullmatch(value):
+                raise self.error(ErrorType.LEX_ERR_INPUT, tok)
+            return self.new_literal("class", self.symbol(value))
+        if not self.patterns.var_name.fullmatch(value):
+            raise self.error(ErrorType.LEX_ERR_INPUT, tok)
+        return self.new_var(self.symbol(value))
+
+    # Funkcia parse_block() parsuje blok za otvaracou zatvorkou '[' az po zatvaraciu ']' vratane.
+    # Gramatika bloku je
+    #   blok    = '[' parametre prikaz* ']'      prikaz  = ID ':=' vyraz '.'
+    #   vyraz   = operand (ID | (KEYWORD operand)+)?
+    #   operand = '(' vyraz ')' | blok | literal
+    # Parser nie je rekurzivny: rozpracovane bloky, zatvorky a klucove spravy su ramce
+    # na zasobniku stack a cyklus prechadza medzi stavmi P_*, takze hlbka vnorenia
+    # nie je obmedzena limitom rekurzie. Stavy su v tele cyklu v poradi, v akom za sebou
+    # zvycajne nasleduju, a prechod do dalsieho stavu pokracuje bez noveho kola cyklu.
+    # Tokeny sa citaju a overuju v rovnakom poradi ako pri rekurzivnom zostupe, chyby
+    # su preto rovnake.
+    def parse_block(self):
+        peek = self.reader.peek
+        advance = self.advance
+        symbols = self.symbols
+        new_send = self.new_send
+        stack = [[F_BLOCK, self.parse_block_params(), [], None]]
+        state = P_STATEMENT
+        node = None
+        while True:
+            try:
+                while True:
+                    if state == P_OPERAND:
+                        tok = advance()
+                        kind = tok[0]
+                        if kind == T_LPAREN:
+                            stack.append(PAREN_FRAME)
+                            continue
+                        if kind == T_LBRACKET:
+                            # Ramec bloku: [F_BLOCK, parametre, prikazy, premenna aktualneho prikazu].
+                            stack.append([F_BLOCK, self.parse_block_params(), [], None])
+                            state = P_STATEMENT
+                            continue
+                        node = self.parse_literal(tok)
+                        state = P_OPERAND_DONE
+                    if state == P_OPERAND_DONE:
+                        frame = stack[-1]
+                        kind = peek()[0]
+                        if frame[0] == F_SEND:
+                            # Argument klucovej spravy: [F_SEND, prijemca, casti selektora, argumenty].
+                            frame[3].append(node)
+                            if kind == T_KEYWORD:
+                                frame[2].append(self.parse_keyword_part())
+                                state = P_OPERAND
+                                continue
+                            stack.pop()
+                            selector = "".join(frame[2])
+                            node = new_send(symbols.setdefault(selector, selector), frame[1], frame[3])
+                        elif kind == T_ID:
+                            # Unarna sprava bez argumentov.
+                            selector = self.text(advance())
+                            node = new_send(symbols.setdefault(selector, selector), node, [])
+                        elif kind == T_KEYWORD:
+                            stack.append([F_SEND, node, [self.parse_keyword_part()], []])
+                            state = P_OPERAND
+                            continue
+                        state = P_EXPR_DONE
+                    if state == P_EXPR_DONE:
+                        frame = stack[-1]
+                        if frame[0] == F_PAREN:
+                            self.expect(T_RPAREN)
+                            stack.pop()
+                            state = P_OPERAND_DONE
+                            continue
+                        self.expect(T_DOT)
+                        frame[2].append(Assign(frame[3], node))
+                    # P_STATEMENT: dalsi prikaz bloku na vrchole zasobnika, alebo jeho koniec.
+                    frame = stack[-1]
+                    if peek()[0] != T_RBRACKET:
+                        frame[3] = self.parse_assign_target()
+                        state = P_OPERAND
+                        continue
+                    advance()
+                    stack.pop()
+                    node = self.new_block(frame[1], frame[2])
+                    if not stack:
+                        return node
+                    state = P_OPERAND_DONE
+            except ParseError as error:
+                if self.errors is None:
+                    raise
+                state = self.resync_block(error, stack)
+
+    # Funkcia resync_block() zaznamena chybu error v parse_block() a preskoci tokeny po
+    # najblizsiu '.' alebo ']' mimo vnorenych zatvoriek. Zo zasobnika stack odstrani
+    # rozpracovane zatvorky a spravy nad najvnutornejsim blokom a vrati stav, v ktorom
+    # parse_block() pokracuje dalsim prikazom alebo koncom bloku. Pri '}' alebo konci
+    # vstupu chybu vyvola znova, aby ju spracovala parse_classes().
+    def resync_block(self, error, stack):
+        kind = self.resync(error, (T_DOT, T_RBRACKET))
+        if kind == T_DOT:
+            self.reader.next()
+        elif kind != T_RBRACKET:
+            raise error
+        while stack[-1][0] != F_BLOCK:
+            stack.pop()
+        return P_STATEMENT
+
+    # Funkcia resync() zaznamena chybu error (ak uz nie je zaznamenana) a preskoci tokeny
+    # po prvy token druhu zo sync mimo vnorenych zatvoriek, po '}' alebo po koniec vstupu.
+    # Vrati druh tokenu, na ktorom skoncila; ten token este neprecita. Ak chybu sposobil
+    # prave precitany token '.', ']' alebo '}', vrati ho spat a hlada od neho.
+    # Chyba na chybnom tokene (T_ERROR) je nasledkom lexikalnej chyby, ktoru uz zaznamenal
+    # lexer, preto sa nezaznamena.
+    def resync(self, error, sync):
+        reader = self.reader
+        if error not in self.handled:
+            self.handled.add(error)
+            last = reader.last
+            if last is not None and last[0] in (T_DOT, T_RBRACKET, T_RBRACE) \
+                    and self.position(last) == (error.line, error.column):
+                reader.rewind(last)
+            # at_lex_error() moze nacitat dalsi token a lexer zaznamenat jeho chybu;
+            # error ju predchadza.
+            count = len(self.errors)
+            if not self.at_lex_error(error):
+                self.errors.insert(count, error)
         depth = 0
-        for ch in s:
-            if ch == '(':
+        while True:
+            kind = reader.peek()[0]
+            if kind == T_EOF or kind == T_RBRACE or depth == 0 and kind in sync:
+                return kind
+            if kind == T_LBRACKET or kind == T_LPAREN:
                 depth += 1
-            elif ch == ')':
+            elif (kind == T_RBRACKET or kind == T_RPAREN) and depth:
                 depth -= 1
-                if depth < 0:
-                    return False
-        return depth == 0
-
-    # Funkcia tokenize() rozdeluje retazec na tokeny, pri zachovani vnorenia zatvoriek.
-    # Doplneny kod: Ak token obsahuje dvojbodku nasledovanu dalsim textom, rozdelime ho.
-    def tokenize(self, s):
-        """
-        Splits the string s into tokens while grouping balanced square brackets
-        and parentheses as single tokens. Also, if a colon ':' is encountered,
-        it is attached to the preceding token.
-        """
-        tokens = []
-        i = 0
-        while i < len(s):
-            # Skip whitespace.
-            if s[i].isspace():
-                i += 1
-                continue
+            reader.next()
 
-            # If we encounter an opening bracket or parenthesis, consume the entire group.
-            if s[i] in "[(":
-                open_char = s[i]
-                close_char = "]" if open_char == "[" else ")"
-                start = i
-                depth = 1
-                i += 1
-                while i < len(s) and depth > 0:
-                    if s[i] == open_char:
-                        depth += 1
-                    elif s[i] == close_char:
-                        depth -= 1
-                    i += 1
-                tokens.append(s[start:i])
-                continue
+    # Funkcia at_lex_error() vrati True, ak je chyba error na mieste chybneho tokenu T_ERROR
+    # (prave precitaneho alebo aktualneho).
+    def at_lex_error(self, error):
+        for tok in (self.reader.last, self.reader.peek()):
+            if tok is not None and tok[0] == T_ERROR and self.position(tok) == (error.line, error.column):
+                return True
+        return False
 
-            # If the character is a colon, attach it to the previous token (if any).
-            if s[i] == ":":
-                if tokens:
-                    tokens[-1] += ":"
-                else:
-                    tokens.append(":")
-                i += 1
-                continue
+    # Funkcia parse_assign_target() nacita zaciatok prikazu 'premenna :=' a vrati meno premennej.
+    def parse_assign_target(self):
+        tok = self.expect(T_ID)
+        var_name = self.text(tok)
+        if not self.patterns.var_name.fullmatch(var_name):
+            raise self.error(ErrorType.LEX_ERR_INPUT, tok)
+        self.expect(T_ASSIGN)
+        return self.symbol(var_name)
 
-            # Otherwise, accumulate a token until whitespace or a special character is reached.
-            start = i
-            while i < len(s) and (not s[i].isspace()) and s[i] not in "[]():":
-                i += 1
-            tokens.append(s[start:i])
-        return tokens
+    # Funkcia parse_keyword_part() nacita jednu cast klucoveho selektora, napr. from:.
+    def parse_keyword_part(self):
+        tok = self.advance()
+        token_sel = self.text(tok)
+        if not self.patterns.keyword_part.fullmatch(token_sel):
+            raise self.error(ErrorType.LEX_ERR_INPUT, tok)
+        return token_sel
 
+    # Funkcia parse_class_header() parsuje hlavicku triedy az po '{' a inicializuje current_class.
+    def parse_class_header(self):
+        class_tok = self.advance()
+        if class_tok[0] != T_ID or self.text(class_tok) != "class":
+            raise self.error(ErrorType.SYN_ERR_INPUT, class_tok)
+        tok = self.advance()
+        parent = ""
+        if tok[0] == T_KEYWORD:
+            cls_name = self.text(tok)[:-1]
+            parent = self.text(self.expect(T_ID))
+        elif tok[0] == T_ID:
+            cls_name = self.text(tok)
+            if self.peek_kind() == T_COLON:
+                self.advance()
+                parent = self.text(self.expect(T_ID))
+            elif self.peek_kind() == T_PARAM:
+                parent = self.text(self.advance())[1:]
+        else:
+            raise self.error(ErrorType.SYN_ERR_INPUT, tok)
+        # Overime, ci nazov triedy aj rodica zacina velkym pismenom.
+        if not self.patterns.class_name.fullmatch(cls_name) or (parent and not self.patterns.class_name.fullmatch(parent)):
+            raise self.error(ErrorType.SYN_ERR_INPUT, tok)
+        self.expect(T_LBRACE)
+        self.current_class = Class(self.symbol(cls_name), self.symbol(parent), [], class_tok[3])
 
-    def parse_inline_block(self, block_str):
-        # Remove the surrounding brackets.
-        inner = block_str[1:-1].strip()
-        params = []
-        instr_str = ""
-        if "|" in inner:
-            param_part, instr_str = inner.split("|", 1)
-            param_part = param_part.strip()
-            if param_part:
-                # Parameters should start with ':'; remove the colon.
-                for token in param_part.split():
-                    if token.startswith(":"):
-                        params.append(token[1:])
-                    else:
-                        sys.exit(ErrorType.LEX_ERR_INPUT.value)
-            instr_str = instr_str.strip()
+    # Funkcia parse_method_header() parsuje selektor metody a vracia trojicu (selector, description, line).
+    # Popisom je komentar zapisany na rovnakom riadku hned za selektorom.
+    def parse_method_header(self):
+        first = tok = self.advance()
+        if tok[0] == T_ID:
+            selector = self.text(tok)
+        elif tok[0] == T_KEYWORD:
+            # Casti klucoveho selektora citame, kym je aktualny token klucove slovo.
+            parts = [self.text(tok)]
+            while self.peek_kind() == T_KEYWORD:
+                tok = self.advance()
+                parts.append(self.text(tok))
+            selector = "".join(parts)
         else:
-            instr_str = inner
-        # Ensure the instructions end with a period.
-        if instr_str and not instr_str.endswith("."):
-            instr_str += "."
-        # Split the instructions by period and reattach the period.
-        raw_instr = [s.strip() + "." for s in instr_str.split(".") if s.strip()]
-        # Use the existing parse_block_instructions to parse the list of instruction lines.
-        instructions = self.parse_block_instructions(raw_instr)
-        return {"type": "block", "arity": len(params), "parameters": params, "instructions": instructions}
-
-
-    def parse_expr(self, expr_str):
-        expr_str = expr_str.strip()
-        # First, if the entire expression is a block literal, handle it:
-        if expr_str.startswith("[") and expr_str.endswith("]"):
-            return self.parse_inline_block(expr_str)
-        # Otherwise, remove any outer balanced parentheses.
-        expr_str = self.strip_parentheses(expr_str)
-        # Then check for string literal, numbers, etc.
-        if expr_str.startswith("'") and not expr_str.endswith("'"):
-            sys.exit(ErrorType.LEX_ERR_INPUT.value)
-        if expr_str and expr_str[0] in "+-" and not re.fullmatch(r"[+-]\d+", expr_str):
-            sys.exit(ErrorType.LEX_ERR_INPUT.value)
-        if re.fullmatch(r"[+-]?\d+", expr_str):
-            return {"type": "literal", "class": "Integer", "value": expr_str}
-        if expr_str in ("nil", "true", "false"):
-            lit_class = {"nil": "Nil", "true": "True", "false": "False"}[expr_str]
-            return {"type": "literal", "class": lit_class, "value": expr_str}
-        if expr_str.startswith("'") and expr_str.endswith("'"):
-            value = expr_str[1:-1]
-            if "\n" in value:
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
-            validate_string_literal(value)
-            value = (value.replace("\\'", "\\&apos;")
-                         .replace("<", "&lt;")
-                         .replace(">", "&gt;")
-                         .replace("&", "&amp;")
-                         .replace('"', "&quot;"))
-            return {"type": "literal", "class": "String", "value": value}
-        # Tokenize the expression using our new tokenizer.
-        tokens = self.tokenize(expr_str)
-        if len(tokens) == 0:
-            return None
-        # If a single token is produced, determine if it is a variable or a class literal.
-        if len(tokens) == 1:
-            token = tokens[0].strip()
-            if token.endswith(":"):
-                token = token.rstrip(":").strip()
-            if token == "":
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
-            if token[0].isupper():
-                if not re.fullmatch(r"[A-Z][A-Za-z0-9]*", token):
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                return {"type": "literal", "class": "class", "value": token}
-            else:
-                if not re.fullmatch(r"[a-z_][A-Za-z0-9]*", token):
-                    print("Problem token (variable):", token, file=sys.stderr)
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                return {"type": "var", "name": token}
-        # Two-token branch: treat as a simple send with no arguments.
-        if len(tokens) == 2:
-            receiver = self.parse_expr(tokens[0])
-            selector = tokens[1].strip()
-            return {"type": "send", "selector": selector, "expr": receiver, "args": []}
-        # Multi-token send expression: tokens should come in pairs after the receiver.
-        if len(tokens) > 2 and tokens[1].strip().endswith(":"):
-            if len(tokens) % 2 == 0:
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
-            receiver = self.parse_expr(tokens[0])
-            selector_parts = []
-            args = []
-            for i in range(1, len(tokens), 2):
-                token_sel = tokens[i].strip()
-                if not token_sel.endswith(":"):
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                if not re.fullmatch(r"[A-Za-z0-9]+:$", token_sel):
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                selector_parts.append(token_sel)
-                if i + 1 < len(tokens):
-                    arg_node = self.parse_expr(tokens[i + 1])
-                    args.append({"order": len(args) + 1, "expr": arg_node})
-            selector = "".join(selector_parts)
-            return {"type": "send", "selector": selector, "expr": receiver, "args": args}
-        sys.exit(ErrorType.LEX_ERR_INPUT.value)
-
-    # Funkcia parse_class_header() parsuje hlavicku triedy a inicializuje current_class.
-    def parse_class_header(self, stripped):
-        m = self.class_header_re.match(stripped)
-        if not m:
-            sys.exit(ErrorType.SYN_ERR_INPUT.value)
-        cls_name = m.group(1)
-        parent = m.group(2) if m.group(2) else ""
-        # Overime, ci nazov triedy zacina velkym pismenom.
-        if not re.fullmatch(r"[A-Z][A-Za-z0-9]*", cls_name):
-            sys.exit(ErrorType.LEX_ERR_INPUT.value)
-        remainder = m.group(3).strip()
-        self.current_class = {"name": cls_name, "parent": parent, "methods": []}
-        if remainder:
-            self.lines.insert(self.index, remainder)
-
-    # Funkcia parse_method_header() parsuje hlavicku metody a vracia dvojicu (selector, description).
-    def parse_method_header(self, stripped):
-        mm = self.method_header_re.match(stripped)
-        if not mm:
-            return None
-        selector = mm.group(1)
-        desc = mm.group(2) if mm.group(2) else ""
-        return (selector, desc)
-
-    # Funkcia parse_block_instructions() parsuje instrukcie v tele bloku.
-    # Pred spracovanim kazdeho riadku kontroluje, ci ma parny pocet jednoduchych uvodzoviek.
-    def parse_block_instructions(self, lines_in_block):
-        instructions = []
-        order = 1
-        # Allow multiline matches; also note DOTALL so '.' can match across newlines
-        assign_re = re.compile(r"^\s*([a-z_][A-Za-z0-9_]*)\s*:=\s*(.+?)\.\s*$", re.DOTALL)
-        integer_re = re.compile(r"^[+-]?\d+$")
-
-        # We'll accumulate lines until we see a trailing period, then parse that chunk
-        combined_lines = []
-        current_line = ""
-
-        # First, check quotes on each line (as before), but don’t parse them yet.
-        for line in lines_in_block:
-            # If the count of non-escaped quotes isn’t 0 or 2, error:
-            if (line.count("'") - line.count("\\'")) not in (0, 2):
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
-
-            # Append this line (stripped) to current_line
-            if current_line:
-                current_line += " " + line.strip()
-            else:
-                current_line = line.strip()
-
-            # If this combined text ends with a period, treat it as a full assignment
-            if current_line.endswith("."):
-                combined_lines.append(current_line)
-                current_line = ""
-
-        # If there's leftover text not ending with a period, push it anyway
-        if current_line:
-            combined_lines.append(current_line)
-
-        # Now parse each combined line with your original logic
-        for line in combined_lines:
-            # Try matching var := something.
-            m = assign_re.match(line.strip())
-            if not m:
-                # If it doesn't match at all, either skip or raise an error
-                # (Skipping is typical if there's leftover blank lines, etc.)
-                continue
+            raise self.error(ErrorType.SYN_ERR_INPUT, tok)
+        if not self.patterns.method_selector.fullmatch(selector):
+            raise self.error(ErrorType.SYN_ERR_INPUT, first)
+        desc = ""
+        comment = self.comment_before_next(tok)
+        if comment and comment[3] == tok[3]:
+            desc = self.comment_text(comment)
+        return (self.symbol(selector), desc, first[3])
 
-            var_name = m.group(1)
-            if not re.fullmatch(r"[a-z_][A-Za-z0-9]*", var_name):
-                sys.exit(ErrorType.LEX_ERR_INPUT.value)
-
-            expr_str = m.group(2).strip()
-            clean_expr = self.strip_parentheses(expr_str)
-
-            # Then do your usual literal/var/block parse:
-            if clean_expr.startswith("[") and clean_expr.endswith("]") and "|" in clean_expr:
-                param_part = clean_expr[1:clean_expr.index("|")].strip()
-                params = []
-                if param_part:
-                    for token in param_part.split():
-                        if token.startswith(":"):
-                            params.append(token[1:])
-                block_node = {"type": "block", "arity": len(params), "parameters": params, "instructions": []}
-                instr = {"type": "assign", "order": order, "var": var_name, "expr": block_node}
-
-            elif clean_expr.startswith("[") and clean_expr.endswith("]"):
-                block_node = {"type": "block", "arity": 0, "parameters": [], "instructions": []}
-                instr = {"type": "assign", "order": order, "var": var_name, "expr": block_node}
-
-            elif integer_re.fullmatch(clean_expr):
-                instr = {
-                    "type": "assign",
-                    "order": order,
-                    "var": var_name,
-                    "expr": {"type": "literal", "class": "Integer", "value": clean_expr}
-                }
-
-            elif clean_expr == "nil":
-                instr = {
-                    "type": "assign",
-                    "order": order,
-                    "var": var_name,
-                    "expr": {"type": "literal", "class": "Nil", "value": "nil"}
-                }
-
-            elif clean_expr == "true":
-                instr = {
-                    "type": "assign",
-                    "order": order,
-                    "var": var_name,
-                    "expr": {"type": "literal", "class": "True", "value": "true"}
-                }
-
-            elif clean_expr == "false":
-                instr = {
-                    "type": "assign",
-                    "order": order,
-                    "var": var_name,
-                    "expr": {"type": "literal", "class": "False", "value": "false"}
-                }
-
-            elif clean_expr.startswith("'") and clean_expr.endswith("'"):
-                value = clean_expr[1:-1]
-                validate_string_literal(value)
-                value = value.replace("\\'", "\\&apos;")
-                instr = {
-                    "type": "assign",
-                    "order": order,
-                    "var": var_name,
-                    "expr": {"type": "literal", "class": "String", "value": value}
-                }
+    # Funkcia parse_method() parsuje jednu metodu (selektor a blok) a ulozi ju do current_class.
+    def parse_method(self):
+        selector, desc, line = self.parse_method_header()
+        if self.current_class.name == "Main" and selector == "run" and desc:
+            self.program_description = desc
+        tok = self.expect(T_LBRACKET)
+        if self.pool is not None and self.brackets.get(tok[1], tok[1]) - tok[1] >= PARALLEL_MIN_BODY:
+            method = Method(selector, desc, None, line)
+            self.deferred.append((method, self.defer_block(tok)))
+        else:
+            method = Method(selector, desc, self.parse_block(), line)
+        self.current_class.methods.append(method)
+        # Komentar za blokom na rovnakom riadku moze v triede Main sluzit ako popis programu.
+        # Moze lezat az za dalsimi tokenmi, preto sa vyhodnocuje az na konci parsovania.
+        if self.current_class.name == "Main":
+            self.description_marks.append(self.reader.last)
 
-            else:
-                node = self.parse_expr(clean_expr)
-                if node is None:
-                    sys.exit(ErrorType.LEX_ERR_INPUT.value)
-                instr = {"type": "assign", "order": order, "var": var_name, "expr": node}
+    # Funkcia defer_block() posle telo metody od '[' v tokene tok po jej ']' na parsovanie
+    # do pool, preskoci ho a vrati future s vysledkom parse_body(). Poslednym precitanym
+    # tokenom je potom ']' tela, rovnako ako po parse_block().
+    def defer_block(self, tok):
+        start = tok[1]
+        end = self.brackets[start]
+        line_start = self.src.rfind("\n", 0, start) + 1
+        future = self.pool.submit(parse_body, self.src[line_start:end + 1], start - line_start, tok[3])
+        line = tok[3] + self.src.count("\n", start, end)
+        self.reader.seek(end + 1, line)
+        self.reader.last = (T_RBRACKET, end, end + 1, line)
+        return future
 
-            instructions.append(instr)
-            order += 1
+    # Funkcia parse_main_parallel() parsuje program ako parse_main(), ale tela metod dlhsie
+    # ako PARALLEL_MIN_BODY parsuje v jobs procesoch. Parser sam prejde iba strukturu:
+    # hlavicky tried a metod, tela preskoci podla parov zatvoriek z outer_blocks()
+    # a kym prejde zvysok textu, procesy parsuju odoslane tela. Tie sa vratia v plochom
+    # kodovani encode_block() a doplnia do metod v poradi textu. Pri akejkolvek chybe
+    # vyvola ParseError bez urcenia miesta; presnu prvu chybu urci az sekvencny parse_main().
+    def parse_main_parallel(self, jobs):
+        import gc
+        from concurrent.futures import ProcessPoolExecutor
+        self.brackets = outer_blocks(self.src)
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        self.pool = pool
+        collect = gc.isenabled()
+        try:
+            program = self.parse_main()
+            # Dekodovane uzly netvoria cykly; bez garbage collectora, ktory by pri kazdom
+            # kole prechadzal cely doteraz vytvoreny strom, je zlucenie niekolkonasobne rychlejsie.
+            gc.disable()
+            for method, future in self.deferred:
+                items = future.result()
+                if items is None:
+                    raise ParseError(ErrorType.SYN_ERR_INPUT)
+                method.block = decode_block(items, 0, self.symbol)[0]
+        finally:
+            if collect:
+                gc.enable()
+            self.pool = None
+            self.deferred = []
+            pool.shutdown(cancel_futures=True)
+        return program
 
-        return instructions
+    # Funkcia resolve_description() doplni popis programu z prveho komentara za blokom metody
+    # triedy Main, ak ho neurcil popis metody run.
+    def resolve_description(self):
+        self.resolve_marks()
+        if self.program_description is None:
+            self.program_description = self.mark_description
 
-    # Funkcia store_method() ulozi aktualnu metodu do current_class a resetuje pomocne premenne.
-    def store_method(self):
-        if not self.current_method:
-            return
-        instructions = self.parse_block_instructions(self.block_body_lines)
-        block = {"arity": len(self.block_params), "parameters": self.block_params, "instructions": instructions}
-        self.current_method["block"] = block
-        self.current_class["methods"].append(self.current_method)
-        self.current_method = None
-        self.in_block = False
-        self.block_params = []
-        self.block_body_lines = []
+    # Funkcia resolve_marks() vyhodnoti description_marks na riadkoch pred riadkom before_line
+    # (predvolene vsetky) a odstrani ich zo zoznamu.
+    def resolve_marks(self, before_line=None):
+        marks = self.description_marks
+        i = 0
+        while i < len(marks) and (before_line is None or marks[i][3] < before_line):
+            if self.mark_description is None:
+                comment = self.comment_after(marks[i][2], marks[i][3])
+                if comment:
+                    self.mark_description = self.comment_text(comment)
+            i += 1
+        del marks[:i]
 
+    # Funkcia release_source() uvolni vstup pred riadkom tokenu tok (zatvaracej '}' triedy).
+    # Komentare za ']' na skorsich riadkoch sa vyhodnotia vopred, lebo sa zahodia spolu s textom.
+    def release_source(self, tok):
+        offset = self.src.rfind("\n", 0, tok[1]) + 1
+        self.resolve_marks(tok[3])
+        comments = self.reader.comments
+        del comments[:bisect.bisect_left(comments, offset, key=lambda c: c[1])]
+        self.src.release(offset)
+
+    # Funkcia parse_main() parsuje cely program a vrati ho ako uzol Program.
     def parse_main(self):
+        self.parse_classes()
+        self.resolve_description()
+        return Program(self.classes, self.program_description)
+
+    # Funkcia parse_classes() parsuje triedy az po koniec vstupu do zoznamu classes.
+    # Popis programu z komentara za blokom este nevyhodnoti.
+    def parse_classes(self):
         while not self.eof():
-            line = self.get_line()
-            self.advance()
-            if not line.strip():
-                continue
-            if self.current_class is None:
-                self.parse_class_header(line.strip())
-            else:
-                stripped = line.strip()
-                if stripped.startswith("}"):
-                    self.classes.append(self.current_class)
-                    self.current_class = None
-                    continue
-                if self.current_method is None and not self.in_block:
-                    m_head = self.parse_method_header(stripped)
-                    if m_head:
-                        selector, desc = m_head
-                        self.current_method = {"selector": selector, "description": desc}
-                        if self.current_class["name"] == "Main" and selector == "run" and desc:
-                            self.program_description = self.transform_description(desc)
-                        continue
-                    else:
-                        if "[" in stripped:
-                            idx = stripped.find("[")
-                            header_part = stripped[:idx].strip()
-                            header_match = self.parse_method_header(header_part)
-                            if header_match:
-                                selector, desc = header_match
-                                self.current_method = {"selector": selector, "description": desc}
-                                if self.current_class["name"] == "Main" and selector == "run" and desc:
-                                    self.program_description = self.transform_description(desc)
-                                stripped = stripped[idx:].strip()
-                            else:
-                                no_comm = self.remove_comments(stripped)
-                                if not no_comm.strip():
-                                    continue
-                                sys.exit(ErrorType.SYN_ERR_INPUT.value)
-                        else:
-                            no_comm = self.remove_comments(stripped)
-                            if not no_comm.strip():
-                                continue
-                            sys.exit(ErrorType.SYN_ERR_INPUT.value)
-                if not self.in_block:
-                    if "[" in stripped and "]" in stripped:
-                        idx_open = stripped.find("[")
-                        idx_close = stripped.find("]")
-                        block_literal = stripped[idx_open:idx_close + 1]
-                        trailing = stripped[idx_close + 1:].strip()
-                        self.in_block = True
-                        self.block_params = []
-                        self.block_body_lines = []
-                        no_comm_block = self.remove_comments(block_literal)
-                        if "|" in no_comm_block:
-                            left = no_comm_block[1:no_comm_block.index("|")].strip()
-                            if left:
-                                for t in left.split():
-                                    if t.startswith(":"):
-                                        self.block_params.append(t[1:])
-                            right = no_comm_block[no_comm_block.index("|") + 1:-1].strip()
-                            if right:
-                                self.block_body_lines.append(right)
-                        self.store_method()
-                        if trailing:
-                            if trailing.strip() == "=":
-                                pass
-                            else:
-                                comment_text = self.extract_first_trailing_comment(trailing)
-                                if (comment_text and self.program_description is None and self.current_class and
-                                        self.current_class["name"] == "Main"):
-                                    self.program_description = comment_text
-                                if trailing:
-                                    self.lines.insert(self.index, trailing)
-                    elif stripped.startswith("["):
-                        self.in_block = True
-                        self.block_params = []
-                        self.block_body_lines = []
-                        no_comm = self.remove_comments(stripped)
-                        if "|" in no_comm:
-                            left = no_comm[1:no_comm.index("|")].strip()
-                            if left:
-                                for t in left.split():
-                                    if t.startswith(":"):
-                                        self.block_params.append(t[1:])
-                            right = no_comm[no_comm.index("|") + 1:].strip()
-                            if right and right != "]":
-                                self.block_body_lines.append(right)
-                    else:
-                        no_comm = self.remove_comments(stripped)
-                        if not no_comm.strip():
-                            continue
-                        sys.exit(ErrorType.SYN_ERR_INPUT.value)
-                else:
-                    if stripped == "]":
-                        self.store_method()
-                    else:
-                        no_comm = self.remove_comments(stripped)
-                        # Only treat as a block header if the line starts with '['.
-                        if no_comm.lstrip().startswith("[") and "|" in no_comm and not self.block_params:
-                            left = no_comm[1:no_comm.index("|")].strip()
-                            if left:
-                                for t in left.split():
-                                    if t.startswith(":"):
-                                        self.block_params.append(t[1:])
-                            right = no_comm[no_comm.index("|") + 1:].strip()
-                            if right:
-                                self.block_body_lines.append(right)
-                        else:
-                            if no_comm.strip():
-                                self.block_body_lines.append(no_comm)
+            if self.errors is None:
+                self.parse_class_header()
+                while self.peek_kind() != T_RBRACE:
+                    if self.eof():
+                        raise self.error(ErrorType.SYN_ERR_INPUT)
+                    self.parse_method()
+            elif not self.parse_class_resync():
+                break
+            tok = self.advance()
+            if self.streaming:
+                self.release_source(tok)
+            if self.current_class is not None:
+                self.classes.append(self.current_class)
+            self.current_class = None
+        return self.classes
+
+    # Funkcia parse_class_resync() parsuje triedu po jej '}' ako parse_classes(), ale chyby
+    # zaznamenava: po chybe v hlavicke preskoci celu triedu, po chybe v metode pokracuje
+    # za jej ']'. Vrati False, ak pri preskakovani dosiahla koniec vstupu.
+    def parse_class_resync(self):
+        try:
+            self.parse_class_header()
+        except ParseError as error:
+            self.current_class = None
+            return self.resync(error, ()) != T_EOF
+        while self.peek_kind() != T_RBRACE:
+            try:
+                if self.eof():
+                    raise self.error(ErrorType.SYN_ERR_INPUT)
+                self.parse_method()
+            except ParseError as error:
+                kind = self.resync(error, (T_RBRACKET,))
+                if kind == T_EOF:
+                    return False
+                if kind == T_RBRACKET:
+                    self.reader.next()
+        return True
 
     # Funkcia check_main() overuje, ci bola deklarovana trieda Main a metoda run.
     def check_main(self):
-        main_found = False
-        run_found = False
-        for cls in self.classes:
-            if cls["name"] == "Main":
-                main_found = True
-                for m in cls["methods"]:
-                    if m["selector"] == "run":
-                        run_found = True
-                        break
-                break
-        if not main_found or not run_found:
-            sys.exit(ErrorType.SEM_IN_MAIN.value)
+        check_main(self.classes)
+
+
+# Funkcia check_main() overuje, ci je v zozname tried trieda Main s metodou run.
+def check_main(classes):
+    main_found = False
+    run_found = False
+    for cls in classes:
+        if cls.name == "Main":
+            main_found = True
+            for m in cls.methods:
+                if m.selector == "run":
+                    run_found = True
+                    break
+            break
+    if not main_found or not run_found:
+        raise ParseError(ErrorType.SEM_IN_MAIN)
 
 
 # Semanticka kontrola: overuje definovane metody a inicializaciu premennych.
 # Tiez kontroluje, ci su definovane vsetky rodicovske triedy (super triedy) pre user-defined triedy.
-def semantic_check(classes):
-    # Define built-in classes and their allowed methods.
-    builtin = {
-        "Integer": {"from:", "new", "plus:"},
-        "String": {"plus:"},
-        "Object": set()
-    }
-    class_methods = {}
-    # Initialize built-in classes.
-    for k, v in builtin.items():
-        class_methods[k] = set(v)
-    # Add methods for user-defined classes.
+def semantic_check(classes, shared=None):
+    table = class_method_table(classes)
     for cls in classes:
-        if cls["parent"] and cls["parent"] not in class_methods:
-            sys.exit(ErrorType.SEM_UNDEFINED.value)
-        if cls["name"] not in class_methods:
-            class_methods[cls["name"]] = set()
-        for m in cls["methods"]:
-            class_methods[cls["name"]].add(m["selector"])
-    # Propagate inheritance.
-    changed = True
-    while changed:
-        changed = False
-        for cls in classes:
-            if cls["parent"]:
-                parent = cls["parent"]
-                if parent in class_methods:
-                    before = len(class_methods[cls["name"]])
-                    class_methods[cls["name"]].update(class_methods[parent])
-                    if len(class_methods[cls["name"]]) > before:
-                        changed = True
-
-    # check_expr recursively verifies that every variable is defined and that message sends are valid.
-    def check_expr(expr, defined_vars):
-        if expr["type"] == "literal":
-            return
-        elif expr["type"] == "var":
-            if expr["name"] not in defined_vars:
-                sys.exit(ErrorType.SEM_UNDEFINED.value)
-        elif expr["type"] == "send":
-            # Check the receiver expression.
-            rec = expr["expr"]
-            if rec["type"] == "literal" and rec.get("class") == "class":
-                cls_name = rec["value"]
-                if cls_name not in class_methods or expr["selector"] not in class_methods[cls_name]:
-                    sys.exit(ErrorType.SEM_UNDEFINED.value)
+        check_class(cls, table, shared)
+
+
+# Vstavane triedy: meno -> (rodic, metody, ktorym trieda rozumie).
+BUILTIN_CLASSES = {
+    "Object": (None, frozenset()),
+    "Integer": ("Object", frozenset({"from:", "new", "plus:"})),
+    "String": ("Object", frozenset({"plus:"})),
+}
+
+
+# Trieda ClassTable je hierarchia tried: pre kazdu triedu odkaz na rodica a mnozina
+# vlastnych metod. Zdedene metody sa nekopiruju; resolves() prejde retazec predkov
+# a vysledok si zapamata pre kazdu triedu na prejdenej ceste.
+class ClassTable:
+    __slots__ = ("parents", "selectors", "order", "_resolved")
+
+    def __init__(self, parents, selectors, order):
+        self.parents = parents  # meno triedy -> meno rodica alebo None
+        self.selectors = selectors  # meno triedy -> mnozina vlastnych metod
+        self.order = order  # mena tried v topologickom poradi (rodic pred potomkom)
+        self._resolved = {}  # (trieda, selektor) -> bool
+
+    def __contains__(self, name):
+        return name in self.parents
+
+    # Funkcia signature() vrati rodica a vlastne metody triedy; ak sa nezmenia
+    # u triedy ani u jej predkov, nezmeni sa ani vysledok resolves() pre tuto triedu.
+    def signature(self, name):
+        return self.parents.get(name), self.selectors.get(name)
+
+    # Funkcia resolves() vrati True, ak trieda name (alebo jej predok) definuje selector.
+    def resolves(self, name, selector):
+        resolved = self._resolved
+        found = resolved.get((name, selector))
+        if found is not None:
+            return found
+        path = []
+        found = False
+        while name is not None:
+            cached = resolved.get((name, selector))
+            if cached is not None:
+                found = cached
+                break
+            local = self.selectors.get(name)
+            if local is None:
+                break
+            path.append(name)
+            if selector in local:
+                found = True
+                break
+            name = self.parents[name]
+        for name in path:
+            resolved[(name, selector)] = found
+        return found
+
+
+# Funkcia class_method_table() vrati ClassTable pre vstavane a definovane triedy.
+# Rodic moze byt definovany aj neskor v programe. Nedefinovany rodic je chyba
+# SEM_UNDEFINED, cyklus v dedicnosti chyba SEM_OTHER (hlasi sa na prvej triede
+# v poradi programu, z ktorej cyklus vedie). Pri viacnasobnej definicii triedy sa
+# metody spoja a plati rodic z prvej definicie.
+def class_method_table(classes):
+    parents = {}
+    selectors = {}
+    for name, (parent, methods) in BUILTIN_CLASSES.items():
+        parents[name] = parent
+        selectors[name] = set(methods)
+    for cls in classes:
+        parents.setdefault(cls.name, cls.parent or None)
+        local = selectors.setdefault(cls.name, set())
+        for m in cls.methods:
+            local.add(m.selector)
+    for cls in classes:
+        if cls.parent and cls.parent not in parents:
+            raise ParseError(ErrorType.SEM_UNDEFINED, cls.line)
+
+    # Topologicke usporiadanie: z kazdej triedy sa ide k predkom, kym sa nenarazi
+    # na uz usporiadanu triedu; trieda navstivena v tom istom prechode znamena cyklus.
+    order = []
+    state = {}  # meno -> 1 pocas prechodu, 2 po zaradeni do order
+    for name in list(BUILTIN_CLASSES) + [cls.name for cls in classes]:
+        path = []
+        walk = name
+        while walk is not None and walk not in state:
+            state[walk] = 1
+            path.append(walk)
+            walk = parents[walk]
+        if walk is not None and state[walk] == 1:
+            line = next(cls.line for cls in classes if cls.name == name)
+            raise ParseError(ErrorType.SEM_OTHER, line)
+        for visited in reversed(path):
+            state[visited] = 2
+            order.append(visited)
+    return ClassTable(parents, selectors, order)
+
+
+# Funkcia check_class() overi tela metod triedy cls voci tabulke z class_method_table().
+def check_class(cls, table, shared=None):
+    for m in cls.methods:
+        check_method(m, table, shared)
+
+
+# Funkcia check_method() overi telo metody m voci tabulke z class_method_table().
+# Kontrola prejde aj vnorene bloky. Premenne metody sa ocisluju malymi cislami (bitmi)
+# a mnozina definovanych premennych je celocislena bitova maska, takze vstup do bloku
+# iba prida bity jeho parametrov k maske okolia a nic sa nekopiruje.
+# Strom sa prechadza bez rekurzie v rovnakom poradi ako rekurzivny prechod do hlbky:
+# listy (premenne a literaly) sa overia hned, do prveho vnoreneho potomka sa zostupi
+# a na zasobnik idu iba zvysni surodenci ako (vyraz, maska) a dalsi prikaz bloku ako
+# (blok, maska, parametre, index), lebo maska rastie az po skontrolovani prikazu.
+# Duplicitny parameter bloku je SEM_OTHER, priradenie do parametra bloku SEM_COLLISION
+# a nedefinovana premenna alebo metoda SEM_UNDEFINED; chyby sa hlasia na riadku,
+# kde zacina metoda.
+# Vysledok kontroly podstromu zavisi iba od neho a od masky defined, preto sa uzol
+# z mnoziny shared (shared_nodes()) s rovnakou maskou v metode overi iba raz.
+def check_method(m, table, shared=None):
+    line = m.line
+    # Kazda metoda zacina s implicitnou premennou self ako jedinou definovanou.
+    bits = {"self": 1}
+    stack = []
+    expr, defined = m.block, 1
+    block = None
+    seen = set()  # overene zdielane uzly ako (uzol, maska)
+    while True:
+        while expr is not None:
+            expr_type = type(expr)
+            if expr_type is Var:
+                if not defined & bits.get(expr.name, 0):
+                    raise ParseError(ErrorType.SEM_UNDEFINED, line)
+                break
+            if shared and expr in shared:
+                if (expr, defined) in seen:
+                    break
+                seen.add((expr, defined))
+            if expr_type is Block:
+                params = 0
+                for name in expr.parameters:
+                    bit = bits.setdefault(name, 1 << len(bits))
+                    if params & bit:
+                        raise ParseError(ErrorType.SEM_OTHER, line)
+                    params |= bit
+                if expr.instructions:
+                    block, defined, i = expr, defined | params, 0
+                break
+            if expr_type is not Send:
+                break
+            nested = None
+            rec = expr.receiver
+            rec_type = type(rec)
+            if rec_type is Literal:
+                if rec.cls == "class" and not table.resolves(rec.value, expr.selector):
+                    raise ParseError(ErrorType.SEM_UNDEFINED, line)
+            elif rec_type is Var:
+                if not defined & bits.get(rec.name, 0):
+                    raise ParseError(ErrorType.SEM_UNDEFINED, line)
             else:
-                check_expr(rec, defined_vars)
-            # Check all arguments.
-            for arg in expr.get("args", []):
-                check_expr(arg["expr"], defined_vars)
-        elif expr["type"] == "block":
-            # New block scope: parameters become defined in the block.
-            new_defined = set(expr.get("parameters", []))
-            # (No further checking inside the block here.)
+                nested = rec
+            args = expr.args
+            first = 0
+            if nested is None:
+                for arg in args:
+                    first += 1
+                    arg_type = type(arg)
+                    if arg_type is Var:
+                        if not defined & bits.get(arg.name, 0):
+                            raise ParseError(ErrorType.SEM_UNDEFINED, line)
+                    elif arg_type is not Literal:
+                        nested = arg
+                        break
+            if first < len(args):
+                stack.extend([(arg, defined) for arg in reversed(args[first:])])
+            expr = nested
+        if block is None:
+            if not stack:
+                break
+            item = stack.pop()
+            if len(item) == 2:
+                expr, defined = item
+                continue
+            block, defined, params, i = item
+        # Prikazy bloku od indexu i; prikazy s listom na pravej strane sa overia hned.
+        instructions = block.instructions
+        expr = None
+        while i < len(instructions):
+            instr = instructions[i]
+            i += 1
+            bit = bits.setdefault(instr.var, 1 << len(bits))
+            if params & bit:
+                raise ParseError(ErrorType.SEM_COLLISION, line)
+            expr_type = type(instr.expr)
+            if expr_type is Var:
+                if not defined & bits.get(instr.expr.name, 0):
+                    raise ParseError(ErrorType.SEM_UNDEFINED, line)
+            elif expr_type is not Literal:
+                expr = instr.expr
+                if i < len(instructions):
+                    stack.append((block, defined | bit, params, i))
+                break
+            defined |= bit
+        block = None
+
+
+# Nahrady zhod ATTR_ESCAPE_PATTERN: znaky, ktore treba v hodnote XML atributu nahradit
+# entitou. Entity, ktore pred escape_attr() vlozi transform_description() alebo
+# string_attr() (\' v retazcoch), sa neescapuju druhy raz a z troch spatnych lomitok
+# pred &apos; zostanu dve.
+XML_ATTR_ESCAPES = {"&": "&amp;", "<": "&lt;", '"': "&quot;", ">": "&gt;",
+                    "&#10;": "&#10;", "&nbsp;": "&nbsp;", "&apos;": "&apos;", "\\\\\\&apos;": "\\\\&apos;"}
+# Pocet roznych retazcovych literalov, ktorych tvar v XML si string_attr() pamata.
+ESCAPE_CACHE_SIZE = 1 << 16
+XML_INDENT = "    "
+XML_FOOTER = b"</program>\n"
+
+
+# Funkcia escape_attr() pripravi hodnotu atributu na zapis do XML jedinym prechodom
+# ATTR_ESCAPE_PATTERN.
+def escape_attr(value):
+    return patterns().attr_escape.sub(escape_match, value)
+
+
+# Funkcia string_attr() vrati hodnotu retazcoveho literalu (text medzi apostrofmi tak,
+# ako je v zdroji) pre atribut value v XML: escapovany apostrof \' zapise ako \&apos;
+# a zvysok escapuje escape_attr(). AST drzi iba povodny text, entity vznikaju az tu.
+# Ten isty retazcovy literal sa v programe casto opakuje, preto sa vysledok pamata
+# pre kazdu roznu hodnotu.
+@functools.lru_cache(maxsize=ESCAPE_CACHE_SIZE)
+def string_attr(value):
+    return escape_attr(value.replace("\\'", "\\&apos;"))
+
+
+# Funkcia escape_match() vrati nahradu jednej zhody ATTR_ESCAPE_PATTERN.
+def escape_match(match):
+    return XML_ATTR_ESCAPES[match.group()]
+
+
+# Funkcia leaf_xml() vrati element literalu alebo premennej expr s odsadenim pad,
+# alebo None, ak expr nie je list stromu.
+# Symboly z tabulky parsera (mena tried, premennych a parametrov, selektory) a literaly
+# okrem String obsahuju iba znaky [A-Za-z0-9_:+-], co parser overuje; ich escapovany
+# text je teda sam symbol a tu, v build_expr_xml() aj v build_class_xml() sa do XML
+# zapisuju priamo bez escape_attr().
+def leaf_xml(expr, pad, nl):
+    expr_type = type(expr)
+    if expr_type is Var:
+        return f'{pad}<var name="{expr.name}"/>{nl}'
+    if expr_type is Literal:
+        value = string_attr(expr.value) if expr.cls == "String" else expr.value
+        return f'{pad}<literal class="{expr.cls}" value="{value}"/>{nl}'
+    return None
+
+
+# Funkcia xml_level() vrati odsadenia a zatvaracie casti elementov pre uroven depth:
+# (odsadenie, odsadenie deti, odsadenie vyrazu v argumente alebo prikaze, koniec
+# prijemcu, koniec argumentu, koniec prikazu, koniec spravy, koniec bloku).
+def xml_level(depth, indent, nl):
+    pad = indent * depth
+    inner = pad + indent
+    return (pad, inner, inner + indent + indent, f'{inner}</expr>{nl}',
+            f'{inner}{indent}</expr>{nl}{inner}</arg>{nl}',
+            f'{inner}{indent}</expr>{nl}{inner}</assign>{nl}',
+            f'{pad}</send>{nl}', f'{pad}</block>{nl}')
+
+
+# Funkcia build_expr_xml() zapise vyraz alebo blok expr do zoznamu parts na urovni odsadenia
+# depth. Pri prazdnom odsadeni indent sa vystup zapisuje kompaktne bez zalomeni riadkov.
+# Strom sa prechadza bez rekurzie: deti elementu (prijemca a argumenty spravy, prikazy
+# bloku) sa zapisuju hned, kym su to listy. Do prveho vnoreneho dietata sa zostupi
+# a zvysok elementu ide na zasobnik v opacnom poradi, ako sa ma zapisat: hotove
+# casti ako retazce a dalsie vnorene deti ako n-tice (uzol, hlbka). Odsadenia
+# a zatvaracie casti sa pre kazdu hlbku pripravia raz (xml_level()).
+# Text spravy alebo bloku z mnoziny shared (shared_nodes()) sa zapamata v slovniku memo
+# pod klucom (uzol, hlbka) a pri dalsom vyskyte sa iba pripoji. Pred zapis takeho uzla
+# ide na zasobnik zoznam [kluc, pocet casti]; po jeho vybrati su vsetky casti uzla
+# zapisane a spoja sa do jedneho retazca.
+def build_expr_xml(expr, parts, depth, indent, shared=None, memo=None):
+    nl = "\n" if indent else ""
+    levels = []
+    stack = []
+    while True:
+        while True:
+            while depth >= len(levels):
+                levels.append(xml_level(len(levels), indent, nl))
+            pad, inner, child_pad, rec_close, arg_close, assign_close, send_end, block_end = levels[depth]
+            expr_type = type(expr)
+            if shared and expr in shared and expr_type is not Literal and expr_type is not Var:
+                # Kompaktny text nezavisi od hlbky.
+                key = (expr, depth if indent else 0)
+                text = memo.get(key)
+                if text is not None:
+                    parts.append(text)
+                    break
+                stack.append([key, len(parts)])
+            if expr_type is Send:
+                parts.append(f'{pad}<send selector="{expr.selector}">{nl}{inner}<expr>{nl}')
+                args = expr.args
+                nested = expr.receiver
+                leaf = leaf_xml(nested, inner + indent, nl)
+                if leaf is None:
+                    first = 0
+                    nested_close = rec_close
+                    nested_depth = depth + 2
+                else:
+                    parts.append(leaf)
+                    parts.append(rec_close)
+                    nested = None
+                    for first, arg in enumerate(args, start=1):
+                        parts.append(f'{inner}<arg order="{first}">{nl}{inner}{indent}<expr>{nl}')
+                        leaf = leaf_xml(arg, child_pad, nl)
+                        if leaf is None:
+                            nested = arg
+                            nested_close = arg_close
+                            nested_depth = depth + 3
+                            break
+                        parts.append(leaf)
+                        parts.append(arg_close)
+                if nested is None:
+                    parts.append(send_end)
+                    break
+                stack.append(send_end)
+                for order in range(len(args), first, -1):
+                    arg = args[order - 1]
+                    open_ = f'{inner}<arg order="{order}">{nl}{inner}{indent}<expr>{nl}'
+                    leaf = leaf_xml(arg, child_pad, nl)
+                    if leaf is None:
+                        stack += (arg_close, (arg, depth + 3), open_)
+                    else:
+                        stack.append(open_ + leaf + arg_close)
+                stack.append(nested_close)
+                expr = nested
+                depth = nested_depth
+                continue
+            if expr_type is not Block:
+                parts.append(leaf_xml(expr, pad, nl))
+                break
+            if not expr.parameters and not expr.instructions:
+                parts.append(f'{pad}<block arity="{expr.arity}"/>{nl}')
+                break
+            parts.append(f'{pad}<block arity="{expr.arity}">{nl}')
+            for idx, par in enumerate(expr.parameters, start=1):
+                parts.append(f'{inner}<parameter order="{idx}" name="{par}"/>{nl}')
+            instructions = expr.instructions
+            nested = None
+            for first, instr in enumerate(instructions, start=1):
+                parts.append(f'{inner}<assign order="{first}">{nl}'
+                             f'{inner}{indent}<var name="{instr.var}"/>{nl}'
+                             f'{inner}{indent}<expr>{nl}')
+                leaf = leaf_xml(instr.expr, child_pad, nl)
+                if leaf is None:
+                    nested = instr.expr
+                    break
+                parts.append(leaf)
+                parts.append(assign_close)
+            if nested is None:
+                parts.append(block_end)
+                break
+            stack.append(block_end)
+            for order in range(len(instructions), first, -1):
+                instr = instructions[order - 1]
+                open_ = (f'{inner}<assign order="{order}">{nl}'
+                         f'{inner}{indent}<var name="{instr.var}"/>{nl}'
+                         f'{inner}{indent}<expr>{nl}')
+                leaf = leaf_xml(instr.expr, child_pad, nl)
+                if leaf is None:
+                    stack += (assign_close, (instr.expr, depth + 3), open_)
+                else:
+                    stack.append(open_ + leaf + assign_close)
+            stack.append(assign_close)
+            expr = nested
+            depth += 3
+        while stack:
+            item = stack.pop()
+            if type(item) is not str:
+                if type(item) is not list:
+                    break
+                key, start = item
+                item = memo[key] = "".join(parts[start:])
+                del parts[start:]
+            parts.append(item)
+        else:
             return
+        expr, depth = item
 
-    # For each method in each class, verify that every used variable is defined.
-    for cls in classes:
-        for m in cls["methods"]:
-            # Start with the block's parameters plus the implicit "self".
-            defined = set(m["block"].get("parameters", []))
-            defined.add("self")
-            for instr in m["block"].get("instructions", []):
-                check_expr(instr["expr"], defined)
-                defined.add(instr["var"])
-
-
-
-
-def build_expr_xml(expr, parent):
-    if expr["type"] == "literal":
-        lit_elem = SubElement(parent, "literal")
-        lit_elem.attrib["class"] = expr["class"]
-        lit_elem.attrib["value"] = expr["value"]
-    elif expr["type"] == "var":
-        var_elem = SubElement(parent, "var")
-        var_elem.attrib["name"] = expr["name"]
-    elif expr["type"] == "send":
-        send_elem = SubElement(parent, "send")
-        send_elem.attrib["selector"] = expr["selector"]
-        inner_expr_elem = SubElement(send_elem, "expr")
-        build_expr_xml(expr["expr"], inner_expr_elem)
-        for arg in expr.get("args", []):
-            arg_elem = SubElement(send_elem, "arg")
-            arg_elem.attrib["order"] = str(arg["order"])
-            arg_expr_elem = SubElement(arg_elem, "expr")
-            build_expr_xml(arg["expr"], arg_expr_elem)
-    elif expr["type"] == "block":
-        block_elem = SubElement(parent, "block")
-        block_elem.attrib["arity"] = str(expr["arity"])
-        for idx, par in enumerate(expr["parameters"], start=1):
-            param_elem = SubElement(block_elem, "parameter")
-            param_elem.attrib["order"] = str(idx)
-            param_elem.attrib["name"] = par
-        # Added: output instructions if the block contains any.
-        for instr in expr.get("instructions", []):
-            if instr["type"] == "assign":
-                assign_elem = SubElement(block_elem, "assign")
-                assign_elem.attrib["order"] = str(instr["order"])
-                var_elem = SubElement(assign_elem, "var")
-                var_elem.attrib["name"] = instr["var"]
-                expr_elem = SubElement(assign_elem, "expr")
-                build_expr_xml(instr["expr"], expr_elem)
-
-
-# Modified build_xml using build_expr_xml for expressions.
-def build_xml(classes, description):
-    root = Element("program")
-    root.attrib["language"] = "SOL25"
-    if description:
-        root.attrib["description"] = description
+
+# Funkcia build_xml() prejde AST raz a zapisuje XML v kodovani UTF-8 priamo do binarneho
+# prudu out. Vystup sa posiela po triedach, takze v pamati je naraz iba XML jednej triedy.
+# Pri compact=True sa vynecha odsadenie aj zalomenia riadkov. Text zdielanych uzlov
+# (shared) sa pocas zapisu pamata pre vsetky triedy spolocne.
+def build_xml(classes, description, out, compact=False, shared=None):
+    out.write(build_xml_header(description, not classes, compact))
+    if not classes:
+        return
+    memo = {} if shared else None
     for c in classes:
-        class_elem = SubElement(root, "class")
-        class_elem.attrib["name"] = c["name"]
-        if c["parent"]:
-            class_elem.attrib["parent"] = c["parent"]
-        for m in c["methods"]:
-            meth_elem = SubElement(class_elem, "method")
-            meth_elem.attrib["selector"] = m["selector"]
-            block = m.get("block", {"arity": 0, "parameters": [], "instructions": []})
-            block_elem = SubElement(meth_elem, "block")
-            block_elem.attrib["arity"] = str(block.get("arity", 0))
-            for idx, par in enumerate(block.get("parameters", []), start=1):
-                param_elem = SubElement(block_elem, "parameter")
-                param_elem.attrib["order"] = str(idx)
-                param_elem.attrib["name"] = par
-            for instr in block.get("instructions", []):
-                if instr["type"] == "assign":
-                    assign_elem = SubElement(block_elem, "assign")
-                    assign_elem.attrib["order"] = str(instr["order"])
-                    var_elem = SubElement(assign_elem, "var")
-                    var_elem.attrib["name"] = instr["var"]
-                    expr_elem = SubElement(assign_elem, "expr")
-                    build_expr_xml(instr["expr"], expr_elem)
-    return root
-
-
-# Hlavna funkcia main() - nacita vstup, spusti parsovanie, vykona semanticku kontrolu,
-# vybuduje XML vystup a vypise ho.
-def main():
-    if len(sys.argv) != 1:
-        if len(sys.argv) == 2 and sys.argv[1] == "--help":
-            show_help()
+        out.write(build_class_xml(c, compact, shared, memo))
+    out.write(XML_FOOTER)
+
+
+# Funkcia build_xml_header() vrati zaciatok dokumentu az po element program vratane.
+# Program bez tried je prazdny element a nema ziadne dalsie casti.
+def build_xml_header(description, empty, compact=False):
+    header = '<?xml version="1.0" encoding="UTF-8"?>\n<program language="SOL25"'
+    if description:
+        header += f' description="{escape_attr(transform_description(description))}"'
+    if empty:
+        return f"{header}/>\n".encode("utf-8")
+    nl = "" if compact else "\n"
+    return f"{header}>{nl}".encode("utf-8")
+
+
+# Funkcia build_class_xml() vrati element class triedy c v kodovani UTF-8.
+def build_class_xml(c, compact=False, shared=None, memo=None):
+    indent = "" if compact else XML_INDENT
+    nl = "" if compact else "\n"
+    parts = [f'{indent}<class name="{c.name}"']
+    if c.parent:
+        parts.append(f' parent="{c.parent}"')
+    if not c.methods:
+        parts.append(f"/>{nl}")
+    else:
+        parts.append(f">{nl}")
+        for m in c.methods:
+            parts.append(f'{indent * 2}<method selector="{m.selector}">{nl}')
+            build_expr_xml(m.block, parts, 3, indent, shared, memo)
+            parts.append(f"{indent * 2}</method>{nl}")
+        parts.append(f"{indent}</class>{nl}")
+    return "".join(parts).encode("utf-8")
+
+
+# Kompaktne formaty AST pre --format. Telo metody sa zapisuje ako plochy zoznam uzlov
+# v poradi preorder, takze zapis ani nacitanie nezavisia od hlbky vnorenia a json ich
+# spracuje bez rekurzie:
+#   literal  N_LITERAL, trieda, hodnota
+#   premenna N_VAR, meno
+#   sprava   N_SEND, selektor, pocet argumentov, prijemca, argumenty v poradi
+#   blok     N_BLOCK, pocet parametrov, parametre, pocet prikazov, (premenna, vyraz) v poradi
+# V json a jsonl su retazce priamo v zozname, v binary indexy do tabulky retazcov.
+# Retazcove literaly a popis programu su povodny text zo zdroja bez XML entit.
+N_LITERAL, N_VAR, N_SEND, N_BLOCK = range(4)
+OUTPUT_FORMATS = {"xml": ".xml", "json": ".json", "jsonl": ".jsonl", "binary": ".bin"}
+BINARY_MAGIC = b"SOL25AST"
+BINARY_VERSION = 2
+# Hlavicka binary: magic, verzia, pocet retazcov, dlzka blobu retazcov, pocet cisel.
+BINARY_HEADER = "<8sBIII"
+
+
+# Funkcia encode_block() pripoji blok block v plochom preorder kodovani na koniec
+# zoznamu items. Funkcia string(s) vrati polozku pre retazec s (retazec alebo index).
+def encode_block(block, items, string):
+    append = items.append
+    stack = [block]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is Send:
+            args = node.args
+            append(N_SEND)
+            append(string(node.selector))
+            append(len(args))
+            stack.extend(reversed(args))
+            push(node.receiver)
+        elif node_type is Var:
+            append(N_VAR)
+            append(string(node.name))
+        elif node_type is Literal:
+            append(N_LITERAL)
+            append(string(node.cls))
+            append(string(node.value))
+        elif node_type is Block:
+            append(N_BLOCK)
+            append(len(node.parameters))
+            items.extend(map(string, node.parameters))
+            instrs = node.instructions
+            append(len(instrs))
+            for instr in reversed(instrs):
+                push(instr.expr)
+                push(instr.var)
         else:
-            print("Neznamy parameter alebo zakazana kombinacia parametrov.", file=sys.stderr)
-            sys.exit(ErrorType.MISSING_PARAM.value)
-    lines = sys.stdin.read().splitlines()
-    while lines and not lines[0].strip():
-        lines.pop(0)
-    if not lines:
-        sys.exit(ErrorType.SEM_IN_MAIN.value)  # Ked je prazdny vstup, chyba SEM_IN_MAIN
-    parser = Parser(lines)
-    parser.parse_main()
-    if parser.current_class is not None or parser.in_block or parser.current_method is not None:
-        sys.exit(ErrorType.SYN_ERR_INPUT.value)
+            # Meno premennej prikazu, ktore v zasobniku predchadza jeho vyraz.
+            append(string(node))
+
+
+# Funkcia decode_block() nacita blok z plocheho zoznamu items od indexu pos a vrati
+# dvojicu (Block, index za blokom). Funkcia string(polozka) vrati retazec pre polozku
+# items (predvolene su retazce priamo v items; binary ma indexy do tabulky retazcov).
+# Pri neznamej znacke uzla vyvola ValueError.
+def decode_block(items, pos, string=str):
+    # Ramec rozpracovanej spravy je [N_SEND, selektor, chybajuce deti, deti], ramec
+    # bloku [N_BLOCK, parametre, chybajuce prikazy, premenne, vyrazy].
+    stack = []
+    while True:
+        if stack and stack[-1][0] == N_BLOCK:
+            stack[-1][3].append(string(items[pos]))
+            pos += 1
+        tag = items[pos]
+        if tag == N_LITERAL:
+            node = Literal(string(items[pos + 1]), string(items[pos + 2]))
+            pos += 3
+        elif tag == N_VAR:
+            node = Var(string(items[pos + 1]))
+            pos += 2
+        elif tag == N_SEND:
+            stack.append([N_SEND, string(items[pos + 1]), items[pos + 2] + 1, []])
+            pos += 3
+            continue
+        elif tag == N_BLOCK:
+            count = items[pos + 1]
+            params = [string(p) for p in items[pos + 2:pos + 2 + count]]
+            pos += 2 + count
+            count = items[pos]
+            pos += 1
+            if count:
+                stack.append([N_BLOCK, params, count, [], []])
+                continue
+            node = Block(params, [])
+        else:
+            raise ValueError(f"unknown node tag {tag}")
+        while stack:
+            frame = stack[-1]
+            if frame[0] == N_SEND:
+                children = frame[3]
+                children.append(node)
+                if len(children) < frame[2]:
+                    break
+                node = Send(frame[1], children[0], children[1:])
+            else:
+                exprs = frame[4]
+                exprs.append(node)
+                if len(exprs) < frame[2]:
+                    break
+                node = Block(frame[1], [Assign(v, e) for v, e in zip(frame[3], exprs)])
+            stack.pop()
+        else:
+            return node, pos
+
+
+# Funkcia class_record() vrati triedu c ako slovnik pre json a jsonl.
+def class_record(c):
+    methods = []
+    for m in c.methods:
+        items = []
+        encode_block(m.block, items, str)
+        methods.append({"selector": m.selector, "block": items})
+    return {"name": c.name, "parent": c.parent or None, "methods": methods}
+
+
+# Funkcia record_class() vytvori triedu zo slovnika z class_record().
+def record_class(record):
+    methods = [Method(m["selector"], "", decode_block(m["block"], 0)[0]) for m in record["methods"]]
+    return Class(record["name"], record["parent"] or "", methods)
+
+
+# Funkcia build_json() zapise program ako jeden kompaktny JSON dokument v UTF-8
+# do binarneho prudu out.
+def build_json(classes, description, out):
+    import json
+    doc = {"language": "SOL25", "description": description,
+           "classes": [class_record(c) for c in classes]}
+    out.write(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    out.write(b"\n")
+
+
+# Funkcia build_jsonl() zapise program ako JSON Lines: prvy riadok je hlavicka programu,
+# kazdy dalsi riadok jedna trieda. Vystup sa posiela po triedach.
+def build_jsonl(classes, description, out):
+    import json
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    out.write(encoder.encode({"language": "SOL25", "description": description}).encode("utf-8"))
+    out.write(b"\n")
+    for c in classes:
+        out.write(encoder.encode(class_record(c)).encode("utf-8"))
+        out.write(b"\n")
+
+
+# Funkcia build_binary() zapise program v binarnom formate: hlavicka BINARY_HEADER,
+# dlzky retazcov, retazce v UTF-8 za sebou a prud cisel. Cisla aj dlzky su uint32
+# little-endian. Kazdy retazec je v tabulke raz; v prude cisel je jeho index.
+# Prud zacina popisom programu a poctom tried, kazda trieda je meno, rodic, pocet
+# metod a metody (selektor a blok). Pri popise a rodicovi je index zvyseny o 1,
+# 0 znamena, ze chyba.
+def build_binary(classes, description, out):
+    import struct
+    from array import array
+    ids = {}
+
+    def string(s):
+        index = ids.get(s)
+        if index is None:
+            index = ids[s] = len(ids)
+        return index
+
+    items = [string(description) + 1 if description else 0, len(classes)]
+    for c in classes:
+        items += (string(c.name), string(c.parent) + 1 if c.parent else 0, len(c.methods))
+        for m in c.methods:
+            items.append(string(m.selector))
+            encode_block(m.block, items, string)
+    encoded = [s.encode("utf-8") for s in ids]
+    lengths = array("I", map(len, encoded))
+    ints = array("I", items)
+    if sys.byteorder == "big":
+        lengths.byteswap()
+        ints.byteswap()
+    blob = b"".join(encoded)
+    out.write(struct.pack(BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION, len(encoded), len(blob), len(ints)))
+    out.write(lengths.tobytes())
+    out.write(blob)
+    out.write(ints.tobytes())
+
+
+# Funkcia load_json() nacita program zapisany cez build_json() (bytes alebo str)
+# a vrati uzol Program. Metody nemaju popis ani cislo riadku.
+def load_json(data):
+    import json
+    doc = json.loads(data)
+    return Program([record_class(r) for r in doc["classes"]], doc["description"])
+
+
+# Funkcia load_jsonl() nacita program zapisany cez build_jsonl() a vrati uzol Program.
+def load_jsonl(data):
+    import json
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    lines = data.splitlines()
+    header = json.loads(lines[0])
+    classes = [record_class(json.loads(line)) for line in lines[1:] if line]
+    return Program(classes, header["description"])
+
+
+# Funkcia load_binary() nacita program zapisany cez build_binary() a vrati uzol Program.
+# Pri poskodenych datach vyvola ValueError.
+def load_binary(data):
+    import struct
+    from array import array
+    data = memoryview(data)
+    header_size = struct.calcsize(BINARY_HEADER)
+    if len(data) < header_size:
+        raise ValueError("not a SOL25 binary AST")
+    magic, version, count, blob_len, int_count = struct.unpack_from(BINARY_HEADER, data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("not a SOL25 binary AST")
+    if len(data) != header_size + 4 * count + blob_len + 4 * int_count:
+        raise ValueError("truncated SOL25 binary AST")
+    pos = header_size + 4 * count
+    lengths = array("I")
+    lengths.frombytes(data[header_size:pos])
+    items = array("I")
+    items.frombytes(data[pos + blob_len:pos + blob_len + 4 * int_count])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+        items.byteswap()
+    if sum(lengths) != blob_len:
+        raise ValueError("corrupted SOL25 binary AST")
+    blob = bytes(data[pos:pos + blob_len])
+    # Pri retazcoch iba z ASCII sa dlzky v bajtoch zhoduju s dlzkami v znakoch a blob
+    # sa dekoduje naraz.
+    text = blob.decode("utf-8")
+    if len(text) != len(blob):
+        text = blob
+    strings = []
+    offset = 0
+    for length in lengths:
+        end = offset + length
+        strings.append(text[offset:end])
+        offset = end
+    if text is blob:
+        strings = [s.decode("utf-8") for s in strings]
+    items = items.tolist()
+    # Index mimo tabulky retazcov alebo prud cisel, ktory skonci uprostred uzla,
+    # vyvola IndexError; prud musi skoncit presne za poslednou metodou.
+    try:
+        description = strings[items[0] - 1] if items[0] else None
+        classes = []
+        pos = 2
+        for _ in range(items[1]):
+            name, parent, method_count = items[pos:pos + 3]
+            pos += 3
+            methods = []
+            for _ in range(method_count):
+                selector = strings[items[pos]]
+                block, pos = decode_block(items, pos + 1, strings.__getitem__)
+                methods.append(Method(selector, "", block))
+            classes.append(Class(strings[name], strings[parent - 1] if parent else "", methods))
+    except (IndexError, ValueError) as e:
+        raise ValueError("corrupted SOL25 binary AST") from e
+    if pos != len(items):
+        raise ValueError("corrupted SOL25 binary AST")
+    return Program(classes, description)
+
+
+# Zapisovace a nacitavace kompaktnych formatov podla hodnoty --format.
+FORMAT_WRITERS = {"json": build_json, "jsonl": build_jsonl, "binary": build_binary}
+FORMAT_LOADERS = {"json": load_json, "jsonl": load_jsonl, "binary": load_binary}
+
+
+# Zaregistrovane funkcie volane na hraniciach faz spracovania.
+PHASE_HOOKS = []
+
+
+# Funkcia add_phase_hook() zaregistruje funkciu hook(udalost, faza), ktora sa zavola
+# so spravou "start" pred kazdou fazou a so spravou "end" po nej. Fazy su read_input,
+# parse_main, semantic_check, build_xml (pri --format build_json, build_jsonl alebo
+# build_binary) a write_output.
+def add_phase_hook(hook):
+    PHASE_HOOKS.append(hook)
+
+
+# Funkcia remove_phase_hook() odregistruje funkciu pridanu cez add_phase_hook().
+def remove_phase_hook(hook):
+    PHASE_HOOKS.remove(hook)
+
+
+# Funkcia run_phase() zavola func(*args) ako fazu name a vrati jej vysledok.
+def run_phase(name, func, *args):
+    if not PHASE_HOOKS:
+        return func(*args)
+    for hook in PHASE_HOOKS:
+        hook("start", name)
+    try:
+        return func(*args)
+    finally:
+        for hook in PHASE_HOOKS:
+            hook("end", name)
+
+
+# Funkcia check_program() vykona kontroly sparsovaneho programu.
+def check_program(parser, program):
     parser.check_main()
     # Semanticka kontrola: overi undefined metody a neinicializovane premenne.
-    semantic_check(parser.classes)
-    root = build_xml(parser.classes, parser.program_description)
-    #print(root, file=sys.stderr)
-    dom = xml.dom.minidom.parseString(tostring(root, encoding="utf-8"))
-    pretty_xml = dom.toprettyxml(indent="    ", encoding="UTF-8")
-    pretty_str = pretty_xml.decode("utf-8")
-    pretty_str = pretty_str.replace("&amp;#10;", "&#10;")
-    pretty_str = pretty_str.replace("&amp;nbsp;", "&nbsp;")
-    pretty_str = pretty_str.replace("&amp;apos;", "&apos;")
-    pretty_str = pretty_str.replace("\\\\\\&apos;", "\\\\&apos;")
-    sys.stdout.write(pretty_str)
+    semantic_check(program.classes, program.shared)
+
+
+# Funkcia open_source() otvori vstup pre --input. Bezny neprazdny subor namapuje cez mmap,
+# "-" (stdin) a ostatne vstupy (rury, zariadenia) cita po blokoch cez StreamSource.
+def open_source(path):
+    import stat
+    if path == "-":
+        return StreamSource(sys.stdin.buffer)
+    try:
+        f = open(path, "rb")
+        info = os.fstat(f.fileno())
+    except OSError:
+        raise ParseError(ErrorType.INPUT_FILE) from None
+    if not stat.S_ISREG(info.st_mode) or info.st_size == 0:
+        return StreamSource(f)
+    with f:
+        return MappedSource(f)
+
+
+# Najmensia dlzka tela metody v znakoch, ktore parse_main_parallel() posle do procesu;
+# kratsie telo sa rychlejsie sparsuje priamo, nez by sa prenieslo.
+PARALLEL_MIN_BODY = 1 << 14
+# Najmensia dlzka textu v znakoch, pri ktorej parse_source(share=True) zdiela uzly. Pri
+# kratsich vstupoch sa opakuje malo vyrazov a mnozina Program.shared zaberie viac
+# pamate, nez zdielanie usetri (tests/*.in maju so zdielanim o 17 % viac).
+SHARE_MIN_SIZE = 256
+
+
+# Funkcia parse_body() sparsuje v pracovnom procese telo metody: text je usek zdroja
+# od zaciatku riadku s '[' po jej ']' vratane, start offset '[' v nom a line jej riadok.
+# Vrati blok v plochom kodovani encode_block(), alebo None, ak telo nie je platny blok
+# konciaci presne na poslednej ']'.
+def parse_body(text, start, line):
+    parser = Parser(text, start, len(text), line)
+    try:
+        parser.expect(T_LBRACKET)
+        block = parser.parse_block()
+        if not parser.eof():
+            return None
+    except ParseError:
+        return None
+    items = []
+    encode_block(block, items, str)
+    return items
+
+
+# Funkcia available_cpus() vrati pocet jadier, na ktorych smie proces bezat (afinita
+# alebo cpuset kontajnera); os.cpu_count() vracia vsetky jadra stroja.
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+# Funkcia parse_source() je verejne rozhranie kniznice: sparsuje zdrojovy text SOL25,
+# vykona vsetky kontroly a vrati uzol Program. Pri chybe vyvola ParseError.
+# Vsetok stav je v lokalnom objekte Parser, takze funkciu mozno volat opakovane
+# aj z viacerych vlakien naraz. Namiesto textu moze dostat ByteSource z open_source().
+# Pri jobs > 1 sa dlhe tela metod parsuju v jobs procesoch (Parser.parse_main_parallel());
+# vysledok aj chyby su rovnake ako pri sekvencnom parsovani. Pocet procesov je najviac
+# pocet dostupnych jadier (available_cpus()); viac procesov na jedno jadro by parsovanie
+# iba spomalilo.
+# Pri share=True su strukturne rovnake vyrazy jeden zdielany uzol (NodeTable) a Program.shared
+# obsahuje uzly s viacerymi rodicmi (None, ak take nie su); parsuje sa vzdy sekvencne.
+# Text kratsi ako SHARE_MIN_SIZE sa parsuje bez zdielania.
+def parse_source(text, jobs=1, share=False):
+    if isinstance(text, str) and not text.strip():
+        raise ParseError(ErrorType.SEM_IN_MAIN)  # Ked je prazdny vstup, chyba SEM_IN_MAIN
+    if isinstance(text, str) and len(text) < SHARE_MIN_SIZE:
+        share = False
+    parser = Parser(text, nodes=NodeTable() if share else None)
+    jobs = min(jobs, available_cpus())
+    if share:
+        program = run_phase("parse_main", parser.parse_main)
+        program.shared = shared_nodes(program.classes) or None
+    elif jobs > 1 and isinstance(text, str):
+        try:
+            program = run_phase("parse_main", parser.parse_main_parallel, jobs)
+        except ParseError:
+            # Chybu aj jej miesto urci sekvencne parsovanie.
+            parser = Parser(text)
+            program = run_phase("parse_main", parser.parse_main)
+    else:
+        program = run_phase("parse_main", parser.parse_main)
+    run_phase("semantic_check", check_program, parser, program)
+    return program
+
+
+# Funkcia collect_errors() sparsuje a skontroluje text ako parse_source(), ale neskonci
+# pri prvej chybe. Vrati dvojicu (zoznam ParseError v poradi, v akom na ne narazi
+# parsovanie, Program alebo None). Prva chyba v zozname je ta, ktoru by vyvolala
+# parse_source(). Lexikalne a syntakticke chyby sa zbieraju s preskocenim po dalsiu
+# '.', ']' alebo '}'; semanticka kontrola bezi iba nad programom bez nich (inak by
+# hlasila nasledky vynechanych prikazov) a zaznamena najviac jednu chybu v kazdej metode.
+def collect_errors(text):
+    if not text.strip():
+        return [ParseError(ErrorType.SEM_IN_MAIN)], None
+    errors = []
+    parser = Parser(text, errors=errors)
+    program = run_phase("parse_main", parser.parse_main)
+    if not errors:
+        run_phase("semantic_check", collect_semantic_errors, program.classes, errors)
+    return errors, None if errors else program
+
+
+# Funkcia collect_semantic_errors() vykona kontroly semantic_check() a check_main()
+# a chyby prida do zoznamu errors.
+def collect_semantic_errors(classes, errors):
+    try:
+        check_main(classes)
+    except ParseError as e:
+        errors.append(e)
+    try:
+        table = class_method_table(classes)
+    except ParseError as e:
+        errors.append(e)
+        return
+    for cls in classes:
+        for m in cls.methods:
+            try:
+                check_method(m, table)
+            except ParseError as e:
+                errors.append(e)
+
+
+# Funkcia errors_json() vrati zoznam chyb z collect_errors() ako JSON pre --all-errors.
+def errors_json(errors):
+    import json
+    return json.dumps({"errors": [{"code": e.code, "error": e.error.name, "line": e.line, "column": e.column}
+                                  for e in errors]})
+
+
+# Funkcia to_xml() zapise program ako XML v kodovani UTF-8 do binarneho prudu out.
+def to_xml(program, out, compact=False):
+    run_phase("build_xml", build_xml, program.classes, program.description, out, compact, program.shared)
+
+
+# Funkcia write_program() zapise program do binarneho prudu out vo formate fmt
+# (kluc OUTPUT_FORMATS); compact sa uplatni iba pri XML.
+def write_program(program, out, fmt="xml", compact=False):
+    if fmt == "xml":
+        to_xml(program, out, compact)
+    else:
+        run_phase("build_" + fmt, FORMAT_WRITERS[fmt], program.classes, program.description, out)
+
+
+# Funkcia load_program() nacita program zapisany cez write_program() vo formate fmt
+# (kluc FORMAT_LOADERS) a vrati uzol Program.
+def load_program(data, fmt):
+    return FORMAT_LOADERS[fmt](data)
+
+
+# Otvaracia zatvorka ku kazdej zatvaracej.
+BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+
+# Trieda BracketTable je tabulka parov zatvoriek (), [] a {} vo zdrojovom texte.
+# Zatvorky v retazcoch a komentaroch sa ignoruju.
+class BracketTable:
+    __slots__ = ("match", "top", "unmatched")
+
+    def __init__(self, match, top, unmatched):
+        self.match = match  # offset otvaracej zatvorky -> offset jej zatvaracej zatvorky
+        self.top = top  # offsety otvaracich zatvoriek mimo inych zatvoriek, v poradi textu
+        self.unmatched = unmatched  # offsety zatvoriek bez paru
+
+
+# Funkcia match_brackets() vytvori BracketTable jednym priechodom textu. Zatvaracia
+# zatvorka, ktorej typ nesedi s poslednou otvorenou, uzavrie najblizsiu otvorenu
+# zatvorku svojho typu a vsetky otvorene medzi nimi zostanu bez paru; ak taka
+# neexistuje, zostane bez paru ona. Preklep v jednej zatvorke tak nerozbije pary
+# okolitych zatvoriek.
+def match_brackets(text, start=0, end=None):
+    if end is None:
+        end = len(text)
+    match = {}
+    top = []
+    unmatched = []
+    stack = []
+    open_counts = {"(": 0, "[": 0, "{": 0}
+    for m in patterns().brackets.finditer(text, start, end):
+        offset = m.start()
+        ch = text[offset]
+        if ch in open_counts:
+            if not stack:
+                top.append(offset)
+            stack.append(offset)
+            open_counts[ch] += 1
+        elif ch in BRACKET_PAIRS:
+            want = BRACKET_PAIRS[ch]
+            if not open_counts[want]:
+                unmatched.append(offset)
+                continue
+            while True:
+                opened = stack.pop()
+                open_counts[text[opened]] -= 1
+                if text[opened] == want:
+                    break
+                unmatched.append(opened)
+            match[opened] = offset
+    unmatched.extend(stack)
+    unmatched.sort()
+    return BracketTable(match, top, unmatched)
+
+
+# Funkcia outer_blocks() vrati slovnik offset '[' -> offset jej ']' pre hranate zatvorky,
+# ktore nie su vnorene v inej hranatej zatvorke (v platnom programe tela metod).
+# Ostatne druhy zatvoriek neprechadza, preto je rychlejsia ako match_brackets().
+def outer_blocks(text):
+    ends = {}
+    depth = 0
+    opened = 0
+    for m in patterns().block_brackets.finditer(text):
+        if m.lastindex is None:
+            continue
+        if m.group(1) == "[":
+            if not depth:
+                opened = m.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth:
+                ends[opened] = m.start()
+    return ends
+
+
+# Funkcia split_class_spans() rozdeli text na useky (zaciatok, koniec), kazdy konci za
+# zatvaracou '}' triedy. Zvysok za poslednou triedou je samostatny usek, ak nie je prazdny.
+# Pri zlozenej zatvorke bez paru vrati jediny usek cez cely text.
+def split_class_spans(text):
+    table = match_brackets(text)
+    if any(text[offset] in "{}" for offset in table.unmatched):
+        return [(0, len(text))]
+    spans = []
+    pos = 0
+    for offset in table.top:
+        if text[offset] == "{":
+            end = table.match[offset] + 1
+            spans.append((pos, end))
+            pos = end
+    if text[pos:].strip():
+        spans.append((pos, len(text)))
+    return spans
+
+
+# Funkcia comment_on_line_after() vrati (zaciatok, koniec) prveho komentara za offsetom
+# offset na tom istom riadku, alebo None. Offset musi byt hranicou tokenu.
+def comment_on_line_after(text, offset):
+    for m in patterns().token.finditer(text, offset):
+        kind = m.lastindex
+        if kind == T_COMMENT:
+            return m.span()
+        if kind == T_WS and "\n" in m.group():
+            return None
+    return None
+
+
+# Trieda ClassSpan je usek zdrojoveho textu s jednou triedou a vysledkami jeho spracovania.
+class ClassSpan:
+    __slots__ = ("digest", "start", "line", "classes", "run_description", "marks",
+                 "refs", "checked", "xml")
+
+    def __init__(self, digest, start, line, classes, run_description, marks):
+        self.digest = digest  # hash textu useku
+        self.start = start  # offset zaciatku useku v aktualnom texte
+        self.line = line  # riadok zaciatku useku
+        self.classes = classes  # triedy useku (zvycajne jedna)
+        self.run_description = run_description  # popis z metody run triedy Main, alebo None
+        self.marks = marks  # offsety za ']' metod triedy Main relativne k start
+        self.refs = class_references(classes)  # triedy pouzite ako prijemca spravy
+        self.checked = False  # True, ak tela metod presli kontrolou voci aktualnej tabulke
+        self.xml = {}  # compact -> XML tried useku
+
+    # Funkcia move() presunie usek na novy zaciatok a posunie cisla riadkov v uzloch.
+    def move(self, start, line):
+        delta = line - self.line
+        self.start = start
+        self.line = line
+        if delta:
+            for cls in self.classes:
+                cls.line += delta
+                for m in cls.methods:
+                    m.line += delta
+
+
+# Funkcia class_references() vrati mnozinu mien tried pouzitych ako literal v telach metod.
+def class_references(classes):
+    refs = set()
+    stack = [m.block for cls in classes for m in cls.methods]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is Block:
+            stack.extend(instr.expr for instr in node.instructions)
+        elif node_type is Send:
+            stack.append(node.receiver)
+            stack.extend(node.args)
+        elif node_type is Literal and node.cls == "class":
+            refs.add(node.value)
+    return refs
+
+
+# Trieda IncrementalParser parsuje opakovane meneny zdrojovy text. Pamata si hash kazdeho
+# useku s triedou z predchadzajuceho behu a znova lexuje a parsuje iba zmenene useky.
+# Tela metod sa znova kontroluju iba v zmenenych usekoch a v usekoch, ktore posielaju
+# spravy triedam so zmenenou mnozinou metod; XML sa znova generuje iba pre zmenene useky.
+# Vysledok aj chyby su zhodne s parse_source() a to_xml().
+class IncrementalParser:
+    def __init__(self):
+        self.spans = []  # useky z posledneho behu v poradi textu
+        self.class_table = None  # hierarchia tried z posledneho behu
+        self.program = None  # posledny uspesne sparsovany program
+
+    # Funkcia parse() sparsuje a skontroluje text a vrati uzol Program.
+    def parse(self, text):
+        from hashlib import blake2b
+        if not text.strip():
+            raise ParseError(ErrorType.SEM_IN_MAIN)
+        previous = {}
+        for span in self.spans:
+            previous.setdefault(span.digest, []).append(span)
+        spans = []
+        line = 1
+        pos = 0
+        for start, end in split_class_spans(text):
+            line += text.count("\n", pos, start)
+            pos = start
+            digest = blake2b(text[start:end].encode("utf-8"), digest_size=16).digest()
+            reuse = previous.get(digest)
+            if reuse:
+                span = reuse.pop()
+                span.move(start, line)
+            else:
+                parser = Parser(text, start, end, line)
+                classes = parser.parse_classes()
+                span = ClassSpan(digest, start, line, classes, parser.program_description,
+                                 [tok[2] - start for tok in parser.description_marks])
+            spans.append(span)
+        self.spans = spans
+
+        classes = [cls for span in spans for cls in span.classes]
+        program = Program(classes, self.resolve_description(text))
+        check_main(classes)
+        self.check(classes)
+        self.program = program
+        return program
+
+    # Funkcia resolve_description() urci popis programu rovnako ako Parser.resolve_description().
+    def resolve_description(self, text):
+        description = None
+        for span in self.spans:
+            if span.run_description is not None:
+                description = span.run_description
+        if description is not None:
+            return description
+        for span in self.spans:
+            for mark in span.marks:
+                comment = comment_on_line_after(text, span.start + mark)
+                if comment:
+                    return text[comment[0] + 1:comment[1] - 1]
+        return None
+
+    # Funkcia check() vykona semanticku kontrolu iba tam, kde sa mohol zmenit jej vysledok.
+    def check(self, classes):
+        table = class_method_table(classes)
+        old = self.class_table
+        # Zmenena je trieda s inym rodicom alebo vlastnymi metodami a kazdy jej potomok.
+        changed = set()
+        for name in table.order:
+            if old is None or table.parents[name] in changed or table.signature(name) != old.signature(name):
+                changed.add(name)
+        if old is not None:
+            changed.update(name for name in old.order if name not in table)
+        pending = [span for span in self.spans if not span.checked or span.refs & changed]
+        # Useky sa oznacia ako neskontrolovane skor, nez sa ulozi nova tabulka, aby ich
+        # pri chybe v skorsom useku dalsi beh skontroloval znova.
+        for span in pending:
+            span.checked = False
+        self.class_table = table
+        for span in pending:
+            for cls in span.classes:
+                check_class(cls, table)
+            span.checked = True
+
+    # Funkcia write_xml() zapise posledny program ako XML do binarneho prudu out;
+    # pouzije XML tried ulozene pri useku, ak sa usek nezmenil.
+    def write_xml(self, out, compact=False):
+        program = self.program
+        out.write(build_xml_header(program.description, not program.classes, compact))
+        if not program.classes:
+            return
+        for span in self.spans:
+            xml = span.xml.get(compact)
+            if xml is None:
+                xml = span.xml[compact] = b"".join(build_class_xml(c, compact) for c in span.classes)
+            out.write(xml)
+        out.write(XML_FOOTER)
+
+
+# Pripony suborov, ktore --batch berie z adresara.
+BATCH_SUFFIXES = (".sol25", ".sol", ".in")
+BATCH_OUT_DIR = "batch_out"
+
+# Parametre bez hodnoty a parametre s hodnotou (--meno HODNOTA alebo --meno=HODNOTA).
+FLAG_OPTIONS = {"--help": "help", "--compact": "compact", "--stats": "stats", "--all-errors": "all_errors",
+                "--share-nodes": "share_nodes"}
+VALUE_OPTIONS = {"--batch": "batch", "--workers": "workers", "--chunksize": "chunksize", "--out-dir": "out_dir",
+                 "--profile": "profile", "--cache-dir": "cache_dir", "--cache-size": "cache_size",
+                 "--watch": "watch", "--serve": "serve", "--input": "input", "--format": "format",
+                 "--jobs": "jobs"}
+BATCH_ONLY_OPTIONS = ("chunksize", "out_dir")
+SINGLE_ONLY_OPTIONS = ("stats", "profile")
+SERVE_EXCLUDED_OPTIONS = ("batch", "stats", "profile", "watch")
+WATCH_EXCLUDED_OPTIONS = ("batch", "stats", "profile", "cache_dir")
+INPUT_EXCLUDED_OPTIONS = ("batch", "watch", "serve", "cache_dir")
+FORMAT_EXCLUDED_OPTIONS = ("watch", "serve", "cache_dir")
+JOBS_EXCLUDED_OPTIONS = ("batch", "watch", "serve", "cache_dir", "input")
+ALL_ERRORS_EXCLUDED_OPTIONS = ("batch", "watch", "serve", "cache_dir", "input", "jobs")
+SHARE_EXCLUDED_OPTIONS = ("batch", "watch", "serve", "cache_dir", "jobs", "all_errors")
+# Interval kontroly zmeny suboru pre --watch v sekundach.
+WATCH_INTERVAL = 0.5
+
+
+# Funkcia usage_error() vypise chybu parametrov a skonci s kodom 10.
+def usage_error():
+    print("Neznamy parameter alebo zakazana kombinacia parametrov.", file=sys.stderr)
+    sys.exit(ErrorType.MISSING_PARAM.value)
+
+
+# Funkcia parse_args() spracuje parametre prikazoveho riadku a vrati slovnik nastaveni.
+# Kazdy parameter smie byt zadany najviac raz a --help nesmie byt kombinovany s inymi.
+def parse_args(argv):
+    opts = {key: False for key in FLAG_OPTIONS.values()}
+    opts.update({key: None for key in VALUE_OPTIONS.values()})
+    i = 0
+    while i < len(argv):
+        name, eq, value = argv[i].partition("=")
+        if name in VALUE_OPTIONS:
+            if not eq:
+                i += 1
+                if i >= len(argv):
+                    usage_error()
+                value = argv[i]
+            key = VALUE_OPTIONS[name]
+            if opts[key] is not None:
+                usage_error()
+            opts[key] = value
+        elif argv[i] in FLAG_OPTIONS:
+            key = FLAG_OPTIONS[argv[i]]
+            if opts[key]:
+                usage_error()
+            opts[key] = True
+        else:
+            usage_error()
+        i += 1
+    if opts["help"] and len(argv) != 1:
+        usage_error()
+    for key in ("workers", "chunksize", "cache_size", "jobs"):
+        if opts[key] is not None:
+            if not opts[key].isdigit() or int(opts[key]) < 1:
+                usage_error()
+            opts[key] = int(opts[key])
+    if opts["batch"] is None and any(opts[key] is not None for key in BATCH_ONLY_OPTIONS):
+        usage_error()
+    if opts["workers"] is not None and opts["batch"] is None and opts["serve"] is None:
+        usage_error()
+    if opts["serve"] is not None and any(opts[key] for key in SERVE_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["batch"] is not None and any(opts[key] for key in SINGLE_ONLY_OPTIONS):
+        usage_error()
+    if opts["cache_size"] is not None and opts["cache_dir"] is None:
+        usage_error()
+    if opts["watch"] is not None and any(opts[key] for key in WATCH_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["input"] is not None and any(opts[key] for key in INPUT_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["jobs"] is not None and any(opts[key] for key in JOBS_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["all_errors"] and any(opts[key] for key in ALL_ERRORS_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["share_nodes"] and any(opts[key] for key in SHARE_EXCLUDED_OPTIONS):
+        usage_error()
+    if opts["format"] is not None:
+        if opts["format"] not in OUTPUT_FORMATS or any(opts[key] for key in FORMAT_EXCLUDED_OPTIONS):
+            usage_error()
+        # --compact meni iba zapis XML.
+        if opts["compact"] and opts["format"] != "xml":
+            usage_error()
+    else:
+        opts["format"] = "xml"
+    return opts
+
+
+# Predvolena horna hranica velkosti cache v MiB a pripona jej zaznamov.
+CACHE_SIZE_MB = 256
+CACHE_SUFFIX = ".cache"
+# Pocitadla cache v tomto procese; --stats ich vypise v casti "cache".
+CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+# Odhad velkosti cache v bajtoch pre kazdy adresar cache v tomto procese (cache_store()).
+CACHE_USAGE = {}
+# Cast hornej hranice, na ktoru cache_evict() cache zmensi, aby dalsie zapisy
+# nevyhadzovali hned znova.
+CACHE_EVICT_TO = 0.75
+
+
+# Funkcia parser_version() vrati hash zdrojoveho kodu parsera. Je sucastou kluca cache,
+# takze kazda zmena parsera zneplatni vsetky stare zaznamy.
+@functools.lru_cache(maxsize=None)
+def parser_version():
+    import hashlib
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Funkcia cache_key() vrati kluc zaznamu: sha256 verzie parsera, rezimu vystupu a vstupu.
+def cache_key(text, compact):
+    import hashlib
+    h = hashlib.sha256(parser_version().encode("ascii"))
+    h.update(b"compact\n" if compact else b"pretty\n")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+# Funkcia cache_lookup() vrati dvojicu (navratovy kod, XML) zo zaznamu key, alebo None.
+# Precitany zaznam dostane novy cas modifikacie, podla ktoreho sa vyhadzuje (LRU).
+# Poskodeny zaznam (prvy riadok nie je cislo) sa povazuje za chybajuci a prepise sa.
+def cache_lookup(cache_dir, key):
+    path = os.path.join(cache_dir, key + CACHE_SUFFIX)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        CACHE_STATS["misses"] += 1
+        return None
+    rc, newline, xml = data.partition(b"\n")
+    if not newline or not rc.isdigit():
+        CACHE_STATS["misses"] += 1
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    CACHE_STATS["hits"] += 1
+    return int(rc), xml
+
+
+# Funkcia cache_store() atomicky zapise zaznam (navratovy kod na prvom riadku, potom XML):
+# zapise ho do docasneho suboru v tom istom adresari a premenuje cez os.replace(),
+# takze subezne procesy nikdy neuvidia ciastocny zaznam. Potom obmedzi velkost cache:
+# adresar sa prejde iba pri prvom zapise procesu a ked odhad velkosti v CACHE_USAGE
+# (velkost po poslednom prechode a zapisy tohto procesu odvtedy) prekroci hranicu.
+# Zapisy inych procesov sa do odhadu nezapocitaju, kym ich neuvidi dalsi prechod.
+def cache_store(cache_dir, key, rc, xml, size_mb):
+    import tempfile
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-")
+    header = b"%d\n" % rc
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(xml)
+        os.replace(tmp_path, os.path.join(cache_dir, key + CACHE_SUFFIX))
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    max_bytes = (size_mb or CACHE_SIZE_MB) * 1024 * 1024
+    usage = CACHE_USAGE.get(cache_dir)
+    if usage is not None:
+        usage += len(header) + len(xml)
+    if usage is None or usage > max_bytes:
+        usage = cache_evict(cache_dir, max_bytes)
+    CACHE_USAGE[cache_dir] = usage
+
+
+# Funkcia cache_evict() zisti velkost cache a ak je vacsia ako max_bytes, vymaze
+# najdlhsie nepouzite zaznamy, kym cache nie je mensia ako CACHE_EVICT_TO * max_bytes.
+# Zaznam zmazany inym procesom sa preskoci. Vrati velkost cache po vymazani.
+def cache_evict(cache_dir, max_bytes):
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if not entry.name.endswith(CACHE_SUFFIX):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, entry.path))
+        total += st.st_size
+    if total <= max_bytes:
+        return total
+    entries.sort()
+    target = int(max_bytes * CACHE_EVICT_TO)
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        CACHE_STATS["evictions"] += 1
+    return total
+
+
+# Funkcia render_source() sparsuje text a vrati dvojicu (navratovy kod, XML v UTF-8);
+# pri chybe je XML prazdne.
+def render_source(text, compact=False):
+    try:
+        program = parse_source(text)
+    except ParseError as e:
+        return e.code, b""
+    buf = io.BytesIO()
+    to_xml(program, buf, compact)
+    return ErrorType.NO_ERROR.value, buf.getvalue()
+
+
+# Funkcia parse_cached() vrati trojicu (navratovy kod, XML, zasah v cache). Pri zasahu
+# sa neparsuje ani negeneruje XML; inak sa vysledok vytvori a ulozi do cache.
+# Chyba pri zapise do cache vysledok nemeni, iba sa nic neulozi.
+def parse_cached(text, compact, cache_dir, size_mb=None):
+    key = cache_key(text, compact)
+    entry = cache_lookup(cache_dir, key)
+    if entry is not None:
+        return entry[0], entry[1], True
+    rc, xml = render_source(text, compact)
+    try:
+        cache_store(cache_dir, key, rc, xml, size_mb)
+    except OSError:
+        pass
+    return rc, xml, False
+
+
+# Funkcia batch_target() vrati cestu vystupov vstupu path v adresari out_dir bez pripony.
+def batch_target(path, out_dir):
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+
+
+# Funkcia parse_file() sparsuje jeden subor a do adresara out_dir zapise <meno>.xml
+# (iba pri uspechu; pri inom formate fmt priponu z OUTPUT_FORMATS) a <meno>.rc
+# s navratovym kodom.
+# Pri zadanom cache_dir pouzije cache (parse_cached()). Neocakavana vynimka pri
+# spracovani suboru sa vypise na stderr a subor dostane kod INTERNAL; ostatne
+# subory davky sa spracuju normalne.
+# Vracia stvoricu (cesta, navratovy kod, cas v sekundach, zasah v cache).
+def parse_file(path, out_dir, compact=False, cache_dir=None, cache_size=None, fmt="xml"):
+    start = time.perf_counter()
+    target = batch_target(path, out_dir)
+    output = target + OUTPUT_FORMATS[fmt]
+    program = None
+    xml = None
+    cached = False
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        rc = ErrorType.INPUT_FILE.value
+    else:
+        if cache_dir is not None:
+            try:
+                rc, xml, cached = parse_cached(text, compact, cache_dir, cache_size)
+            except Exception as e:
+                print(f"{path}: {e!r}", file=sys.stderr)
+                rc = ErrorType.INTERNAL.value
+        else:
+            try:
+                program = parse_source(text)
+                rc = ErrorType.NO_ERROR.value
+            except ParseError as e:
+                rc = e.code
+            except Exception as e:
+                print(f"{path}: {e!r}", file=sys.stderr)
+                rc = ErrorType.INTERNAL.value
+    try:
+        if program is not None:
+            with open(output, "wb") as out:
+                write_program(program, out, fmt, compact)
+        elif xml is not None and rc == ErrorType.NO_ERROR.value:
+            with open(output, "wb") as out:
+                out.write(xml)
+        elif os.path.exists(output):
+            os.remove(output)
+        with open(target + ".rc", "w") as f:
+            f.write(f"{rc}\n")
+    except OSError:
+        rc = ErrorType.OUTPUT_FILE.value
+    return path, rc, time.perf_counter() - start, cached
+
+
+# Funkcia collect_batch_inputs() vrati zoznam vstupnych suborov pre --batch:
+# subory s priponou z BATCH_SUFFIXES v adresari, cesty podla vzoru alebo zoznam cest zo stdin (-).
+def collect_batch_inputs(spec):
+    import glob
+    if spec == "-":
+        return [line.strip() for line in sys.stdin if line.strip()]
+    if os.path.isdir(spec):
+        return sorted(os.path.join(spec, name) for name in os.listdir(spec) if name.endswith(BATCH_SUFFIXES))
+    return sorted(path for path in glob.glob(spec, recursive=True) if os.path.isfile(path))
+
+
+# Funkcia run_batch() sparsuje vsetky vstupy v jednom behu. Subory rozdeli medzi procesy
+# ProcessPoolExecutor po davkach velkosti chunksize a na konci vypise suhrn s casmi.
+# Vstupy, ktorych vystupy by mali rovnake meno (x.sol a x.in, rovnake mena v roznych
+# adresaroch), sa odmietnu skor, nez sa cokolvek zapise.
+def run_batch(opts):
+    paths = collect_batch_inputs(opts["batch"])
+    if not paths:
+        print("Pre --batch sa nenasli ziadne vstupne subory.", file=sys.stderr)
+        sys.exit(ErrorType.INPUT_FILE.value)
+    out_dir = opts["out_dir"] or BATCH_OUT_DIR
+    targets = {}
+    for path in paths:
+        other = targets.setdefault(batch_target(path, out_dir), path)
+        if other != path:
+            print(f"Vstupy {other} a {path} maju rovnake meno vystupu.", file=sys.stderr)
+            sys.exit(ErrorType.OUTPUT_FILE.value)
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+    except OSError:
+        sys.exit(ErrorType.OUTPUT_FILE.value)
+    workers = min(opts["workers"] or available_cpus(), len(paths))
+    chunksize = opts["chunksize"] or max(1, len(paths) // (workers * 4))
+    job = functools.partial(parse_file, out_dir=out_dir, compact=opts["compact"],
+                            cache_dir=opts["cache_dir"], cache_size=opts["cache_size"], fmt=opts["format"])
+    start = time.perf_counter()
+    if workers == 1:
+        results = [job(path) for path in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(job, paths, chunksize=chunksize))
+    wall = time.perf_counter() - start
+
+    failed = 0
+    for path, rc, elapsed, _ in results:
+        print(f"{rc:3d} {elapsed * 1000:10.2f} ms  {path}")
+        if rc != ErrorType.NO_ERROR.value:
+            failed += 1
+    cpu = sum(r[2] for r in results)
+    print(f"Files: {len(results)}, ok: {len(results) - failed}, errors: {failed}, "
+          f"workers: {workers}, wall: {wall:.3f} s, sum of file times: {cpu:.3f} s")
+    if opts["cache_dir"] is not None:
+        hits = sum(1 for r in results if r[3])
+        print(f"Cache hits: {hits}, misses: {len(results) - hits}")
+
+
+# Trieda PhaseRecorder je funkcia pre add_phase_hook(), ktora pre kazdu fazu scita
+# cas (wall aj CPU) a pri zapnutom tracemalloc zaznamena spicku alokovanej pamate.
+# Zaroven sklada udalosti vo formate Chrome trace-event.
+class PhaseRecorder:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}
+        self.events = []
+        self._open = {}
+
+    def __call__(self, event, phase):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if event == "start":
+            if self.memory:
+                import tracemalloc
+                tracemalloc.reset_peak()
+            self._open[phase] = (wall, cpu)
+        else:
+            wall_start, cpu_start = self._open.pop(phase)
+            entry = self.phases.setdefault(phase, {"wall_ms": 0.0, "cpu_ms": 0.0})
+            entry["wall_ms"] = round(entry["wall_ms"] + (wall - wall_start) * 1000, 3)
+            entry["cpu_ms"] = round(entry["cpu_ms"] + (cpu - cpu_start) * 1000, 3)
+            if self.memory:
+                import tracemalloc
+                peak = tracemalloc.get_traced_memory()[1]
+                entry["peak_memory"] = max(entry.get("peak_memory", 0), peak)
+        self.events.append({"name": phase, "ph": "B" if event == "start" else "E",
+                            "ts": wall * 1e6, "pid": os.getpid(), "tid": 0})
+
+
+# Funkcia count_program() spocita riadky a tokeny vstupu a triedy, metody, spravy
+# a literaly programu (program je None, ak parsovanie zlyhalo). Pri --input sa text
+# neuchovava (text je None) a riadky ani tokeny sa nepocitaju.
+def count_program(text, program):
+    counts = {}
+    if text is not None:
+        counts = {"lines": text.count("\n") + (1 if text and not text.endswith("\n") else 0),
+                  "tokens": 0, "comments": 0}
+        comments = []
+        try:
+            for tok in lex(text, comments):
+                if tok[0] != T_EOF:
+                    counts["tokens"] += 1
+        except ParseError:
+            pass
+        counts["comments"] = len(comments)
+    if program is None:
+        return counts
+    counts.update(classes=len(program.classes), methods=0, sends=0, literals=0)
+    stack = []
+    for cls in program.classes:
+        counts["methods"] += len(cls.methods)
+        stack.extend(m.block for m in cls.methods)
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is Block:
+            stack.extend(instr.expr for instr in node.instructions)
+        elif node_type is Send:
+            counts["sends"] += 1
+            stack.append(node.receiver)
+            stack.extend(node.args)
+        elif node_type is Literal:
+            counts["literals"] += 1
+    return counts
+
+
+# Funkcia run_single() sparsuje program zo stdin (alebo z --input) a zapise XML
+# (alebo format z --format) na stdout.
+# Vracia trojicu (navratovy kod, vstupny text alebo None pri --input, Program alebo None);
+# pri pouziti cache sa Program nevytvara.
+def run_single(opts):
+    compact = opts["compact"]
+    if opts["input"] is not None:
+        text = None
+        try:
+            source = run_phase("read_input", open_source, opts["input"])
+        except ParseError as e:
+            return e.code, text, None
+    else:
+        text = source = run_phase("read_input", sys.stdin.read)
+    if opts["cache_dir"] is not None:
+        rc, xml, _ = parse_cached(text, compact, opts["cache_dir"], opts["cache_size"])
+        if rc == ErrorType.NO_ERROR.value:
+            sys.stdout.buffer.write(xml)
+            run_phase("write_output", sys.stdout.buffer.flush)
+        return rc, text, None
+    if opts["all_errors"]:
+        errors, program = collect_errors(source)
+        print(errors_json(errors), file=sys.stderr)
+        if errors:
+            return errors[0].code, text, None
+    else:
+        try:
+            program = parse_source(source, opts["jobs"] or 1, opts["share_nodes"])
+        except ParseError as e:
+            return e.code, text, None
+    del source
+    write_program(program, sys.stdout.buffer, opts["format"], compact)
+    run_phase("write_output", sys.stdout.buffer.flush)
+    return ErrorType.NO_ERROR.value, text, program
+
+
+# Funkcia run_instrumented() spusti run_single() s merianim pre --stats a --profile.
+# --stats vypise JSON s casmi faz, spickou pamate a poctami na stderr. --profile SUBOR
+# zapise data cProfile, alebo pri pripone .json udalosti faz vo formate Chrome trace.
+# Pri --stats bezi tracemalloc, ktory samotne fazy vyrazne spomali.
+def run_instrumented(opts):
+    import json
+    import tracemalloc
+    recorder = PhaseRecorder(memory=opts["stats"])
+    profile_path = opts["profile"]
+    profiler = None
+    if profile_path is not None and not profile_path.endswith(".json"):
+        import cProfile
+        profiler = cProfile.Profile()
+    if opts["stats"]:
+        tracemalloc.start()
+    add_phase_hook(recorder)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        rc, text, program = run_single(opts)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        remove_phase_hook(recorder)
+
+    if opts["stats"]:
+        report = {"rc": rc, "phases": recorder.phases,
+                  "peak_memory": max([e["peak_memory"] for e in recorder.phases.values()], default=0),
+                  "counts": count_program(text, program)}
+        if opts["cache_dir"] is not None:
+            report["cache"] = dict(CACHE_STATS)
+        tracemalloc.stop()
+        print(json.dumps(report, indent=2), file=sys.stderr)
+    if profile_path is not None:
+        try:
+            if profiler is not None:
+                profiler.dump_stats(profile_path)
+            else:
+                with open(profile_path, "w", encoding="utf-8") as f:
+                    json.dump({"traceEvents": recorder.events, "displayTimeUnit": "ms"}, f)
+        except OSError:
+            return ErrorType.OUTPUT_FILE.value
+    return rc
+
+
+# Hlavicka poziadavky pre --serve: dlzka zdrojoveho textu v bajtoch a priznaky
+# (bit SERVE_FLAG_COMPACT zapne --compact), za nou nasleduje text v UTF-8.
+# Hlavicka odpovede: navratovy kod a dlzka XML, za nou nasleduje XML.
+# Na jednom spojeni moze klient poslat viac poziadaviek za sebou.
+SERVE_REQUEST = ">IB"
+SERVE_RESPONSE = ">iI"
+SERVE_FLAG_COMPACT = 1
+SERVE_MAX_PAYLOAD = 64 * 1024 * 1024
+
+
+# Funkcia serve_job() spracuje jednu poziadavku servera v pracovnom procese
+# a vrati dvojicu (navratovy kod, XML) so semantikou ako pri volani z prikazoveho riadku.
+def serve_job(payload, compact, cache_dir=None, cache_size=None):
+    try:
+        text = payload.decode("utf-8")
+    except UnicodeDecodeError:
+        return ErrorType.INPUT_FILE.value, b""
+    if cache_dir is not None:
+        return parse_cached(text, compact, cache_dir, cache_size)[:2]
+    return render_source(text, compact)
+
+
+# Funkcia serve_client() obsluzi jedno spojenie: cita poziadavky, kym ich klient posiela.
+# Semafor limit obmedzuje pocet poziadaviek spracovavanych naraz na pocet procesov.
+# Kazda poziadavka dostane odpoved; ak spracovanie zlyha inak ako chybou vstupu,
+# odpoved ma kod INTERNAL (99) a prazdne XML.
+async def serve_client(reader, writer, pool, limit, job):
+    import asyncio
+    import struct
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(struct.calcsize(SERVE_REQUEST))
+            except asyncio.IncompleteReadError:
+                break
+            length, flags = struct.unpack(SERVE_REQUEST, header)
+            if length > SERVE_MAX_PAYLOAD:
+                break
+            payload = await reader.readexactly(length)
+            async with limit:
+                try:
+                    rc, xml = await loop.run_in_executor(pool, job, payload, bool(flags & SERVE_FLAG_COMPACT))
+                except Exception as e:
+                    # Pad pracovneho procesu alebo neocakavana chyba parsera; klient dostane
+                    # odpoved s kodom INTERNAL namiesto zatvoreneho spojenia.
+                    print(f"--serve: {e!r}", file=sys.stderr)
+                    rc, xml = ErrorType.INTERNAL.value, b""
+            writer.write(struct.pack(SERVE_RESPONSE, rc, len(xml)) + xml)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+# Funkcia serve() spusti asyncio server na Unix sockete path a obsluhuje klientov,
+# kym nepride SIGINT alebo SIGTERM. Procesy sa nastartuju vopred, aby prva
+# poziadavka nezaplatila ich vytvorenie.
+async def serve(path, workers, job):
+    import asyncio
+    import signal
+    from concurrent.futures import ProcessPoolExecutor
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(workers)
+    stop = loop.create_future()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        server = await asyncio.start_unix_server(
+            lambda reader, writer: serve_client(reader, writer, pool, limit, job), path)
+        async with server:
+            await stop
+
+
+# Funkcia run_serve() spusti --serve SOCKET. Zastaraly socket po predchadzajucom
+# behu sa odstrani; ak socket nejde vytvorit, skonci s kodom 12.
+def run_serve(opts):
+    import asyncio
+    import stat
+    path = opts["serve"]
+    workers = opts["workers"] or available_cpus()
+    job = functools.partial(serve_job, cache_dir=opts["cache_dir"], cache_size=opts["cache_size"])
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        asyncio.run(serve(path, workers, job))
+    except OSError:
+        sys.exit(ErrorType.OUTPUT_FILE.value)
+    finally:
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# Funkcia run_watch() sleduje subor opts["watch"] a po kazdej zmene ho znova sparsuje
+# cez IncrementalParser. Pri uspechu vypise XML na stdout, vzdy vypise na stderr riadok
+# s navratovym kodom a casom. Konci prerusenim (Ctrl+C); ak subor na zaciatku nejde
+# precitat, skonci s kodom 11.
+def run_watch(opts):
+    path = opts["watch"]
+    parser = IncrementalParser()
+    last = None
+    try:
+        while True:
+            try:
+                st = os.stat(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+                if stamp != last:
+                    with open(path, encoding="utf-8", newline="") as f:
+                        text = f.read()
+            except (OSError, UnicodeDecodeError):
+                if last is None:
+                    sys.exit(ErrorType.INPUT_FILE.value)
+                time.sleep(WATCH_INTERVAL)
+                continue
+            if stamp != last:
+                last = stamp
+                start = time.perf_counter()
+                try:
+                    parser.parse(text)
+                    rc = ErrorType.NO_ERROR.value
+                except ParseError as e:
+                    rc = e.code
+                if rc == ErrorType.NO_ERROR.value:
+                    parser.write_xml(sys.stdout.buffer, opts["compact"])
+                    sys.stdout.buffer.flush()
+                elapsed = time.perf_counter() - start
+                print(f"{rc:3d} {elapsed * 1000:10.2f} ms  {path}", file=sys.stderr, flush=True)
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+
+
+# Hlavna funkcia main() - spracuje parametre, nacita vstup a zapise XML vystup.
+# Chyby z kniznice (ParseError) prevedie na navratovy kod programu.
+def main():
+    opts = parse_args(sys.argv[1:])
+    if opts["help"]:
+        show_help()
+    if opts["batch"] is not None:
+        run_batch(opts)
+        return
+    if opts["watch"] is not None:
+        run_watch(opts)
+        return
+    if opts["serve"] is not None:
+        run_serve(opts)
+        return
+    if opts["stats"] or opts["profile"] is not None:
+        rc = run_instrumented(opts)
+    else:
+        rc = run_single(opts)[0]
+    if rc != ErrorType.NO_ERROR.value:
+        sys.exit(rc)
 
 
 # Spustenie hlavnej funkcie main().
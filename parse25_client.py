@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Klient pre server parse25.py --serve.
+
+Posle program zo stdin na server, vypise vratene XML na stdout a skonci
+s navratovym kodom parsera, rovnako ako python3 parse25.py. Neimportuje
+parse25, aby start klienta bol co najkratsi.
+
+Pouzitie: python3 parse25_client.py SOCKET [--compact] < input_file > output_file
+"""
+import socket
+import struct
+import sys
+
+# Format sprav zhodny s parse25.SERVE_REQUEST, SERVE_RESPONSE a SERVE_FLAG_COMPACT.
+REQUEST = struct.Struct(">IB")
+RESPONSE = struct.Struct(">iI")
+FLAG_COMPACT = 1
+# Navratove kody klienta pri chybe parametrov a pri nedostupnom serveri.
+USAGE_ERROR = 10
+CONNECTION_ERROR = 99
+
+
+# Funkcia recv_exactly() precita zo socketu presne size bajtov.
+def recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+# Funkcia request() posle zdrojovy text (str alebo bytes) na otvoreny socket sock
+# a vrati dvojicu (navratovy kod, XML v UTF-8).
+def request(sock, source, compact=False):
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    sock.sendall(REQUEST.pack(len(source), FLAG_COMPACT if compact else 0) + source)
+    rc, length = RESPONSE.unpack(recv_exactly(sock, RESPONSE.size))
+    return rc, recv_exactly(sock, length)
+
+
+# Funkcia connect() otvori spojenie so serverom na Unix sockete path.
+def connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return sock
+
+
+def main():
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    args = [a for a in args if a != "--compact"]
+    if len(args) != 1 or args[0].startswith("--"):
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(USAGE_ERROR)
+    source = sys.stdin.buffer.read()
+    try:
+        with connect(args[0]) as sock:
+            rc, xml = request(sock, source, compact)
+    except OSError as e:
+        print(f"parse25_client: {e}", file=sys.stderr)
+        sys.exit(CONNECTION_ERROR)
+    sys.stdout.buffer.write(xml)
+    sys.stdout.buffer.flush()
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
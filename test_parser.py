@@ -1,13 +1,35 @@
 #!/usr/bin/env python3
+"""
+Spustac testov pre parse25.py.
+
+Predvolene sa parse25 importuje raz v kazdom pracovnom procese a jeho main()
+sa vola priamo, takze sa neplati start interpretera za kazdy test. Testy sa
+rozdelia medzi pracovne procesy.
+
+Pouzitie: python3 test_parser.py [--isolated] [--workers N]
+  --isolated    Kazdy test spusti ako samostatny proces python3 parse25.py.
+  --workers N   Pocet pracovnych procesov (predvolene pocet jadier).
+"""
+import io
 import os
 import re
 import subprocess
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
 GREEN = "\033[92m"
 RED = "\033[91m"
 RESET = "\033[0m"
 
+# Pocet najpomalsich testov vypisanych v suhrne.
+SLOWEST = 5
+
+# Moduly, ktore "import parse25" pri starte nesmie importovat.
+LAZY_MODULES = ("re", "asyncio", "concurrent.futures", "json", "hashlib", "tempfile",
+                "cProfile", "tracemalloc", "glob", "xml.dom.minidom", "xml.etree.ElementTree")
+
 def numeric_key(filename):
     """
     Vrati tuple, ktory pouzijeme na triedenie podla cisla v nazve suboru,
@@ -40,7 +62,77 @@ def normalize_xml(xml_str):
     normalized_lines = [line.strip() for line in lines if line.strip() != ""]
     return "\n".join(normalized_lines)
 
-def run_file_tests():
+def run_isolated(args, input_text):
+    """
+    Spusti parse25.py ako samostatny proces a vrati (rc, stdout, stderr).
+    """
+    cmd = ["python3", "parse25.py"] + args
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True, encoding="utf-8")
+    stdout, stderr = process.communicate(input=input_text)
+    return process.returncode, stdout, stderr
+
+def run_in_process(args, input_text):
+    """
+    Zavola parse25.main() priamo v tomto procese s presmerovanymi sys.argv,
+    sys.stdin, sys.stdout a sys.stderr a vrati (rc, stdout, stderr).
+    Navratovy kod sa ziska zo SystemExit rovnako ako pri samostatnom procese.
+    """
+    import parse25
+    out = io.BytesIO()
+    err = io.StringIO()
+    saved = sys.argv, sys.stdin, sys.stdout, sys.stderr
+    sys.argv = ["parse25.py"] + args
+    # newline="\n" necha '\r' v texte rovnako ako sys.stdin na Linuxe.
+    sys.stdin = io.TextIOWrapper(io.BytesIO(input_text.encode("utf-8")), encoding="utf-8", newline="\n")
+    sys.stdout = io.TextIOWrapper(out, encoding="utf-8", write_through=True)
+    sys.stderr = err
+    rc = 0
+    try:
+        parse25.main()
+    except SystemExit as e:
+        if e.code is None:
+            rc = 0
+        elif isinstance(e.code, int):
+            rc = e.code
+        else:
+            print(e.code, file=err)
+            rc = 1
+    except Exception:
+        traceback.print_exc(file=err)
+        rc = 1
+    finally:
+        # Odpojime obal, aby pri jeho zruseni nezatvoril buffer s vystupom.
+        sys.stdout.flush()
+        sys.stdout.detach()
+        sys.argv, sys.stdin, sys.stdout, sys.stderr = saved
+    return rc, out.getvalue().decode("utf-8"), err.getvalue()
+
+def run_case(case, isolated):
+    """
+    Spusti jeden test a vrati (rc, stdout, stderr, cas v sekundach).
+    """
+    input_text = ""
+    if case["input"]:
+        with open(case["input"], "r", encoding="utf-8") as inp:
+            input_text = inp.read()
+    runner = run_isolated if isolated else run_in_process
+    start = time.perf_counter()
+    rc, stdout, stderr = runner(case["args"], input_text)
+    return rc, stdout, stderr, time.perf_counter() - start
+
+def run_cases(cases, isolated, workers):
+    """
+    Spusti vsetky testy, pri workers > 1 rozdelene medzi pracovne procesy.
+    Vysledky vrati v poradi testov.
+    """
+    if workers <= 1:
+        return [run_case(case, isolated) for case in cases]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_case, cases, [isolated] * len(cases),
+                             chunksize=max(1, len(cases) // (workers * 4))))
+
+def collect_file_tests():
     tests_dir = "tests"
     # najdeme vsetky subory konciace na .in (a nie z param. testov)
     test_files = [f for f in os.listdir(tests_dir)
@@ -48,18 +140,11 @@ def run_file_tests():
     # Zoradime podla cisla
     test_files.sort(key=numeric_key)
 
-    total = len(test_files)
-    passed = 0
-    if total:
-        print("File-based tests:")
-
+    cases = []
     for in_file in test_files:
         test_name = in_file[:-3]  # odstranime ".in"
-        out_file = test_name + ".out"
-        rc_file = test_name + ".rc"
-        in_path = os.path.join(tests_dir, in_file)
-        out_path = os.path.join(tests_dir, out_file)
-        rc_path = os.path.join(tests_dir, rc_file)
+        out_path = os.path.join(tests_dir, test_name + ".out")
+        rc_path = os.path.join(tests_dir, test_name + ".rc")
 
         expected_rc = 0
         if os.path.exists(rc_path):
@@ -67,52 +152,18 @@ def run_file_tests():
                 try:
                     expected_rc = int(f.read().strip())
                 except ValueError:
-                    print(f"{RED}Test {test_name}: Chyba vo formate .rc suboru!{RESET}")
-                    continue
+                    expected_rc = None
 
         expected_output = ""
         if os.path.exists(out_path):
             with open(out_path, "r", encoding="utf-8") as f:
                 expected_output = f.read()
 
-        cmd = ["python3", "parse25.py"]
-        with open(in_path, "r", encoding="utf-8") as inp:
-            process = subprocess.Popen(cmd, stdin=inp, stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE, text=True)
-            stdout, stderr = process.communicate()
-        actual_rc = process.returncode
-
-        if actual_rc != expected_rc:
-            print(f"{RED}Test {test_name}: FAIL (RC {actual_rc} != {expected_rc}){RESET}")
-            print("----- STDERR -----")
-            print(stderr)
-            print("------------------")
-            continue
-
-        if expected_rc != 0:
-            print(f"{GREEN}Test {test_name}: OK (expected RC = {expected_rc}){RESET}")
-            passed += 1
-            continue
+        cases.append({"name": test_name, "args": [], "input": os.path.join(tests_dir, in_file),
+                      "expected_rc": expected_rc, "expected_output": expected_output})
+    return cases
 
-        # Porovname vystup
-        norm_stdout = normalize_xml(stdout)
-        norm_expected = normalize_xml(expected_output)
-        if norm_stdout == norm_expected:
-            print(f"{GREEN}Test {test_name}: OK{RESET}")
-            passed += 1
-        else:
-            print(f"{RED}Test {test_name}: FAIL (output mismatch){RESET}")
-            print("----- Expected output -----")
-            print(norm_expected)
-            print("----- Actual output -----")
-            print(norm_stdout)
-            print("-------------------------")
-
-    if total:
-        print(f"File tests: {passed}/{total} passed.\n")
-    return passed, total
-
-def run_param_tests():
+def collect_param_tests():
     param_tests = [
         {"name": "test0_1", "args": ["--hekp"], "expected_rc": 10},
         {"name": "test0_2", "args": ["--help", "asd"], "expected_rc": 10},
@@ -123,36 +174,528 @@ def run_param_tests():
         {"name": "test0_7", "args": ["-help"], "expected_rc": 10},
         {"name": "test0_8", "args": ["help"], "expected_rc": 10},
         {"name": "test0_9", "args": ["--Help"], "expected_rc": 10},
+        {"name": "test0_10", "args": ["--compact", "--help"], "expected_rc": 10},
+        {"name": "test0_11", "args": ["--compact"], "expected_rc": 31},
+        {"name": "test0_12", "args": ["--workers", "2"], "expected_rc": 10},
+        {"name": "test0_13", "args": ["--batch", "nonexistent_dir/*.sol25"], "expected_rc": 11},
+        {"name": "test0_14", "args": ["--batch"], "expected_rc": 10},
+        {"name": "test0_15", "args": ["--stats", "--batch", "tests"], "expected_rc": 10},
+        {"name": "test0_16", "args": ["--stats"], "expected_rc": 31},
+        {"name": "test0_17", "args": ["--cache-size", "3"], "expected_rc": 10},
+        {"name": "test0_18", "args": ["--watch", "nonexistent_dir/a.sol25"], "expected_rc": 11},
+        {"name": "test0_19", "args": ["--watch", "a.sol25", "--batch", "tests"], "expected_rc": 10},
+        {"name": "test0_20", "args": ["--serve"], "expected_rc": 10},
+        {"name": "test0_21", "args": ["--serve", "s.sock", "--batch", "tests"], "expected_rc": 10},
+        {"name": "test0_22", "args": ["--input", "nonexistent_dir/a.sol25"], "expected_rc": 11},
+        {"name": "test0_23", "args": ["--input", "a.sol25", "--watch", "a.sol25"], "expected_rc": 10},
+        {"name": "test0_24", "args": ["--format", "yaml"], "expected_rc": 10},
+        {"name": "test0_25", "args": ["--format", "json", "--serve", "s.sock"], "expected_rc": 10},
+        {"name": "test0_26", "args": ["--jobs", "2", "--batch", "tests"], "expected_rc": 10},
+        {"name": "test0_27", "args": ["--jobs", "0"], "expected_rc": 10},
+        {"name": "test0_28", "args": ["--all-errors", "--input", "a.sol25"], "expected_rc": 10},
+        {"name": "test0_29", "args": ["--share-nodes", "--jobs", "2"], "expected_rc": 10},
+        {"name": "test0_30", "args": ["--format", "json", "--compact"], "expected_rc": 10},
+        {"name": "test0_31", "args": ["--compact", "--format", "binary", "--batch", "tests"], "expected_rc": 10},
     ]
-    print("Parameter tests:")
-    total = len(param_tests)
-    passed = 0
     for test in param_tests:
-        name = test["name"]
-        args = test["args"]
-        expected_rc = test["expected_rc"]
-        cmd = ["python3", "parse25.py"] + args
-        process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                   text=True)
-        stdout, stderr = process.communicate(input="")
-        actual_rc = process.returncode
-        if actual_rc != expected_rc:
-            print(f"{RED}{name}: FAIL (RC {actual_rc} != {expected_rc}){RESET}")
-            print("----- STDERR -----")
-            print(stderr)
-            print("------------------")
+        test["input"] = None
+        test["expected_output"] = None
+    return param_tests
+
+def report_file_test(case, result):
+    test_name = case["name"]
+    expected_rc = case["expected_rc"]
+    actual_rc, stdout, stderr, elapsed = result
+    timing = f" [{elapsed * 1000:.1f} ms]"
+
+    if expected_rc is None:
+        print(f"{RED}Test {test_name}: Chyba vo formate .rc suboru!{RESET}")
+        return False
+
+    if actual_rc != expected_rc:
+        print(f"{RED}Test {test_name}: FAIL (RC {actual_rc} != {expected_rc}){RESET}{timing}")
+        print("----- STDERR -----")
+        print(stderr)
+        print("------------------")
+        return False
+
+    if expected_rc != 0:
+        print(f"{GREEN}Test {test_name}: OK (expected RC = {expected_rc}){RESET}{timing}")
+        return True
+
+    # Porovname vystup
+    norm_stdout = normalize_xml(stdout)
+    norm_expected = normalize_xml(case["expected_output"])
+    if norm_stdout == norm_expected:
+        print(f"{GREEN}Test {test_name}: OK{RESET}{timing}")
+        return True
+    print(f"{RED}Test {test_name}: FAIL (output mismatch){RESET}{timing}")
+    print("----- Expected output -----")
+    print(norm_expected)
+    print("----- Actual output -----")
+    print(norm_stdout)
+    print("-------------------------")
+    return False
+
+def report_param_test(case, result):
+    name = case["name"]
+    expected_rc = case["expected_rc"]
+    actual_rc, stdout, stderr, elapsed = result
+    timing = f" [{elapsed * 1000:.1f} ms]"
+    if actual_rc != expected_rc:
+        print(f"{RED}{name}: FAIL (RC {actual_rc} != {expected_rc}){RESET}{timing}")
+        print("----- STDERR -----")
+        print(stderr)
+        print("------------------")
+        return False
+    print(f"{GREEN}{name}: OK{RESET}{timing}")
+    return True
+
+def check_import_budget():
+    """
+    Spusti python3 -X importtime -c "import parse25" a overi, ze sa neimportuje
+    ziadny modul z LAZY_MODULES. Cas importov zavislosti (kumulativny cas parse25
+    bez jeho vlastneho casu) sa iba vypise; zavisi od stroja, preto sa neporovnava.
+    """
+    deps_ms = None
+    imported = set()
+    process = subprocess.run(["python3", "-X", "importtime", "-c", "import parse25"],
+                             capture_output=True, text=True)
+    for line in process.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$", line)
+        if not m:
+            continue
+        imported.add(m.group(4))
+        if m.group(4) == "parse25":
+            deps_ms = (int(m.group(2)) - int(m.group(1))) / 1000
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if deps_ms is None:
+        print(f"{RED}Import budget: FAIL (import parse25 failed){RESET}")
+        return False
+    if eager:
+        print(f"{RED}Import budget: FAIL (eager imports: {', '.join(eager)}){RESET}")
+        return False
+    print(f"{GREEN}Import budget: OK (no eager imports, dependencies {deps_ms:.1f} ms){RESET}")
+    return True
+
+# Program pre check_incremental() a jeho upravy; kazda verzia sa parsuje po predchadzajucej.
+INCREMENTAL_BASE = """"Program s dvoma triedami"
+class Main : Object {
+    run [|
+        x := Helper new.
+        y := Helper twice: 3.
+    ]
+}
+
+class Helper : Integer {
+    twice: [:n | r := n plus: n.]
+}
+"""
+INCREMENTAL_VERSIONS = [
+    INCREMENTAL_BASE,
+    INCREMENTAL_BASE.replace("r := n plus: n.", "r := (n plus: n) plus: 'a&b'."),
+    INCREMENTAL_BASE.replace("twice:", "thrice:", 1),
+    INCREMENTAL_BASE.replace("class Helper", "class Extra : Helper {\n    other [|]\n}\n\nclass Helper"),
+    INCREMENTAL_BASE.replace("twice: 3.", "twice: 3 +."),
+    INCREMENTAL_BASE.replace("Program s dvoma triedami", "Iny popis"),
+    INCREMENTAL_BASE,
+]
+
+def parse_result(parse, write):
+    """
+    Zavola parse() a pri uspechu write(out) a vrati (rc, riadok chyby, XML).
+    """
+    import parse25
+    try:
+        parse()
+    except parse25.ParseError as e:
+        return e.code, e.line, None
+    out = io.BytesIO()
+    write(out)
+    return 0, None, out.getvalue()
+
+def check_incremental():
+    """
+    Sparsuje postupnost verzii INCREMENTAL_VERSIONS jednym IncrementalParser
+    a overi, ze navratovy kod, riadok chyby a XML su po kazdej zmene rovnake
+    ako pri uplnom parsovani parse_source() a to_xml().
+    """
+    import parse25
+    inc = parse25.IncrementalParser()
+    for i, text in enumerate(INCREMENTAL_VERSIONS):
+        full = {}
+        expected = parse_result(lambda: full.setdefault("p", parse25.parse_source(text)),
+                                lambda out: parse25.to_xml(full["p"], out))
+        actual = parse_result(lambda: inc.parse(text), inc.write_xml)
+        if actual != expected:
+            print(f"{RED}Incremental parse: FAIL (version {i}: {actual[:2]} != {expected[:2]}"
+                  f"{', XML differs' if actual[:2] == expected[:2] else ''}){RESET}")
+            return False
+    print(f"{GREEN}Incremental parse: OK ({len(INCREMENTAL_VERSIONS)} versions){RESET}")
+    return True
+
+# Vstupy s ne-ASCII znakmi pred chybou pre check_input(); druhy obsahuje dve triedy
+# na jednom riadku, takze chyba je za uz uvolnenou castou vstupu, posledne dva maju
+# konce riadkov '\r' a '\r\n'.
+INPUT_ERROR_CASES = [
+    "class Main : Object { run [| x := 'ýé'. y := @. ] }",
+    "class A : Object { m [| x := 'ýé'.] } class Main : Object { run [| y := 'é'. z := ( . ] }",
+    "\"popis ýé\" class Main : Object {\n run [| x := 'ýéý' foo: . ] }",
+    "class Main : Object {\r run [|\r x := 'ý'.\r y := @. ] }",
+    "class Main : Object {\r\n run [|\r\n\r\n x := 'é' foo: . ] }",
+]
+
+# Vstupy s '\r' pre check_input(): --input FILE a --input - musia dat rovnaky navratovy
+# kod a vystup ako stdin, ktory '\r' necha v texte (retazec, popis, cisla riadkov chyb).
+INPUT_NEWLINE_CASES = [
+    "class Main : Object { run [| x := 'a\rb'. ] }",
+    "class Main : Object {\r\n run \"prvy riadok\r\ndruhy riadok\"\r\n [| x := 1. ]\r\n}\r\n",
+    "class Main : Object {\r run [|\r x := 1.\r y := @. ] }",
+    "class Main : Object {\r\n run [|\r\n\r\n x := 1 foo: . ] }",
+]
+
+def check_input():
+    """
+    Overi, ze --input FILE aj --input - davaju rovnaky navratovy kod a vystup ako
+    citanie zo stdin pre vsetky tests/*.in a ze chyby vo vstupoch INPUT_ERROR_CASES
+    maju pri citani po bajtoch (open_source(), StreamSource) rovnaku poziciu ako v texte.
+    """
+    import tempfile
+    import parse25
+    paths = [case["input"] for case in collect_file_tests()]
+    fd, tmp_path = tempfile.mkstemp(suffix=".sol25")
+    os.close(fd)
+    try:
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            expected = run_in_process([], text)[:2]
+            for args, stdin in ((["--input", path], ""), (["--input", "-"], text)):
+                actual = run_in_process(args, stdin)[:2]
+                if actual != expected:
+                    print(f"{RED}Input modes: FAIL ({' '.join(args)} on {path}: "
+                          f"RC {actual[0]} != {expected[0]}){RESET}")
+                    return False
+        for text in INPUT_NEWLINE_CASES:
+            with open(tmp_path, "wb") as f:
+                f.write(text.encode("utf-8"))
+            expected = run_in_process([], text)[:2]
+            for args, stdin in ((["--input", tmp_path], ""), (["--input", "-"], text)):
+                actual = run_in_process(args, stdin)[:2]
+                if actual != expected:
+                    print(f"{RED}Input modes: FAIL ({' '.join(args)} on {text!r}: "
+                          f"RC {actual[0]} != {expected[0]}{', output differs' if actual[0] == expected[0] else ''}){RESET}")
+                    return False
+        for text in INPUT_ERROR_CASES:
+            with open(tmp_path, "wb") as f:
+                f.write(text.encode("utf-8"))
+            results = []
+            for source in (text, parse25.open_source(tmp_path),
+                           parse25.StreamSource(io.BytesIO(text.encode("utf-8")))):
+                try:
+                    parse25.parse_source(source)
+                    results.append(None)
+                except parse25.ParseError as e:
+                    results.append((e.code, e.line, e.column))
+            if results[0] is None or results.count(results[0]) != len(results):
+                print(f"{RED}Input modes: FAIL (error positions {results} in {text!r}){RESET}")
+                return False
+    finally:
+        os.unlink(tmp_path)
+    print(f"{GREEN}Input modes: OK ({len(paths)} files, {len(INPUT_NEWLINE_CASES)} line ending cases, "
+          f"{len(INPUT_ERROR_CASES)} error positions){RESET}")
+    return True
+
+# Program pre check_formats() s textom, ktory XML zapisuje ako entity.
+FORMAT_PROGRAM = """class Main : Object {
+    run "Popis
+programu & <b>" [|
+        x := 'it\\'s a & b <c> \\\\'.
+        y := [:a | r := a plus: 'q"q'.].
+    ]
+}
+"""
+
+def check_formats():
+    """
+    Pre FORMAT_PROGRAM a vsetky tests/*.in bez chyby overi, ze program zapisany cez
+    write_program() v kazdom kompaktnom formate a nacitany cez load_program() da
+    rovnake XML ako povodny a ze kompaktne formaty nesu povodny text bez XML entit.
+    Orezany alebo poskodeny binary musi load_program() odmietnut cez ValueError.
+    """
+    import struct
+    import parse25
+    texts = [FORMAT_PROGRAM]
+    for case in collect_file_tests():
+        if case["expected_rc"] == 0:
+            with open(case["input"], encoding="utf-8") as f:
+                texts.append(f.read())
+    for text in texts:
+        program = parse25.parse_source(text)
+        expected = io.BytesIO()
+        parse25.to_xml(program, expected)
+        for fmt in parse25.FORMAT_LOADERS:
+            data = io.BytesIO()
+            parse25.write_program(program, data, fmt)
+            loaded = parse25.load_program(data.getvalue(), fmt)
+            actual = io.BytesIO()
+            parse25.to_xml(loaded, actual)
+            if actual.getvalue() != expected.getvalue():
+                print(f"{RED}Format round trip: FAIL ({fmt} XML differs){RESET}")
+                return False
+            if text is FORMAT_PROGRAM:
+                value = loaded.classes[0].methods[0].block.instructions[0].expr.value
+                if value != "it\\'s a & b <c> \\\\" or loaded.description != "Popis\nprogramu & <b>":
+                    print(f"{RED}Format round trip: FAIL ({fmt} carries {value!r}, "
+                          f"{loaded.description!r}){RESET}")
+                    return False
+    data = io.BytesIO()
+    parse25.write_program(parse25.parse_source(FORMAT_PROGRAM), data, "binary")
+    data = data.getvalue()
+    header_size = struct.calcsize(parse25.BINARY_HEADER)
+    _, _, count, blob_len, int_count = struct.unpack_from(parse25.BINARY_HEADER, data)
+    ints_at = header_size + 4 * count + blob_len
+
+    def put(offset, value):
+        return data[:offset] + struct.pack("<I", value) + data[offset + 4:]
+
+    broken = {
+        "5 bytes": data[:5],
+        "header only": data[:header_size],
+        "last byte missing": data[:-1],
+        "last int missing": data[:-4],
+        "trailing byte": data + b"\0",
+        "string lengths": put(header_size, 0xFFFF),
+        "description index": put(ints_at, 0xFFFFFFFF),
+        "class count": put(ints_at + 4, 1000),
+        "node tag": put(ints_at + 4 * 6, 7),
+        "last index": put(len(data) - 4, 0xFFFFFFFF),
+        "int count": put(9 + 4 * 2, int_count - 1)[:-4],
+    }
+    for name, corrupted in broken.items():
+        try:
+            parse25.load_program(corrupted, "binary")
+        except ValueError:
+            continue
+        except Exception as e:
+            print(f"{RED}Format round trip: FAIL (binary with {name}: {e!r} instead of ValueError){RESET}")
+            return False
+        print(f"{RED}Format round trip: FAIL (binary with {name} loaded){RESET}")
+        return False
+    print(f"{GREEN}Format round trip: OK ({len(texts)} programs, {len(parse25.FORMAT_LOADERS)} formats, "
+          f"{len(broken)} corrupted binaries){RESET}")
+    return True
+
+def parallel_program(methods, statements, broken=False):
+    """
+    Vrati program s metodami, ktorych tela su dlhsie ako PARALLEL_MIN_BODY.
+    Pri broken=True ma posledne telo syntakticku chybu v polovici.
+    """
+    lines = ["class Main : Object {", "    run [| x := 0.]"]
+    for m in range(methods):
+        lines.append(f"    m{m}: [:a |")
+        for i in range(statements):
+            if broken and m == methods - 1 and i == statements // 2:
+                lines.append("        x := (a plus: .")
+            lines.append(f"        x := (a plus: {i}) max: (self m{m}: 'abc' with: [:b | c := b.]).")
+        lines.append("    ]")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def check_parallel():
+    """
+    Overi, ze Parser.parse_main_parallel() s dvoma procesmi da pre program s dlhymi
+    telami metod rovnake XML ako sekvencne parsovanie a ze pri chybe v tele vyvola
+    ParseError (parse_source() potom chybu urci sekvencne). Volanie obchadza obmedzenie
+    poctu procesov na pocet jadier, takze test prebehne aj na jednom jadre. Obmedzenie
+    plati pre jadra z afinity procesu, nie pre vsetky jadra stroja.
+    """
+    import parse25
+    if hasattr(os, "sched_getaffinity"):
+        if parse25.available_cpus() != len(os.sched_getaffinity(0)):
+            print(f"{RED}Parallel parse: FAIL (available_cpus() ignores the CPU affinity){RESET}")
+            return False
+    text = parallel_program(3, 400)
+    expected = io.BytesIO()
+    parse25.to_xml(parse25.Parser(text).parse_main(), expected)
+    actual = io.BytesIO()
+    parse25.to_xml(parse25.Parser(text).parse_main_parallel(2), actual)
+    if actual.getvalue() != expected.getvalue():
+        print(f"{RED}Parallel parse: FAIL (XML differs from the sequential parse){RESET}")
+        return False
+    try:
+        parse25.Parser(parallel_program(3, 400, broken=True)).parse_main_parallel(2)
+    except parse25.ParseError:
+        pass
+    else:
+        print(f"{RED}Parallel parse: FAIL (syntax error in a parallel body not reported){RESET}")
+        return False
+    print(f"{GREEN}Parallel parse: OK ({len(text)} bytes){RESET}")
+    return True
+
+# Program s viacerymi chybami pre check_all_errors() a ocakavane chyby (kod, riadok, stlpec).
+# Lexikalna chyba nema v tom istom prikaze nasledne syntakticke chyby.
+ALL_ERRORS_PROGRAM = """class Main : Object {
+    run [|
+        x := @.
+        y := (1 plus: .
+        z := 2.
+    ]
+    other [| a := $ b. ]
+}
+"""
+ALL_ERRORS_EXPECTED = [(21, 3, 14), (22, 4, 23), (21, 7, 19)]
+
+def check_all_errors():
+    """
+    Overi JSON, ktory --all-errors vypise pre ALL_ERRORS_PROGRAM, a ze prva zo
+    vsetkych chyb je ta, ktoru hlasi bezny rezim, pre vsetky tests/*.in a ich
+    upravy s vynechanym znakom v tretine a dvoch tretinach textu.
+    """
+    import json
+    import parse25
+    rc, _, stderr = run_in_process(["--all-errors"], ALL_ERRORS_PROGRAM)
+    try:
+        report = [(e["code"], e["line"], e["column"]) for e in json.loads(stderr)["errors"]]
+    except (ValueError, KeyError, TypeError):
+        report = stderr
+    if report != ALL_ERRORS_EXPECTED or rc != ALL_ERRORS_EXPECTED[0][0]:
+        print(f"{RED}All errors: FAIL (RC {rc}, {report} != {ALL_ERRORS_EXPECTED}){RESET}")
+        return False
+    texts = []
+    for case in collect_file_tests():
+        with open(case["input"], encoding="utf-8") as f:
+            text = f.read()
+        texts.append(text)
+        for k in (len(text) // 3, 2 * len(text) // 3):
+            texts.append(text[:k] + text[k + 1:])
+    for text in texts:
+        try:
+            parse25.parse_source(text)
+            expected = None
+        except parse25.ParseError as e:
+            expected = (e.code, e.line, e.column)
+        errors, _ = parse25.collect_errors(text)
+        first = (errors[0].code, errors[0].line, errors[0].column) if errors else None
+        if first != expected:
+            print(f"{RED}All errors: FAIL (first error {first} != {expected} in {text[:60]!r}){RESET}")
+            return False
+    print(f"{GREEN}All errors: OK ({len(texts)} inputs){RESET}")
+    return True
+
+# Program s opakovanymi podvyrazmi pre check_share(): rovnake spravy a bloky v roznych
+# hlbkach, metodach a s roznymi definovanymi premennymi.
+SHARE_PROGRAM = """class Main : Object {
+    run [|
+        x := (1 plus: 2) plus: (1 plus: 2).
+        y := [:a | r := (a plus: 'a&b') plus: (a plus: 'a&b').].
+        z := [:a | r := (a plus: 'a&b') plus: (a plus: 'a&b').].
+        w := (y value: ((1 plus: 2) plus: (1 plus: 2))) value: [:a | r := (a plus: 'a&b') plus: (a plus: 'a&b').].
+    ]
+    other [| x := (1 plus: 2) plus: (1 plus: 2). ]
+}
+"""
+# Verzie SHARE_PROGRAM s chybou: zdielany podvyraz je raz v bloku s parametrom a,
+# raz mimo neho, kde a nie je definovana.
+SHARE_BROKEN = [
+    SHARE_PROGRAM.replace("    other [|", "    bad [| x := (a plus: 'a&b') plus: (a plus: 'a&b'). ]\n    other [|"),
+    SHARE_PROGRAM.replace("w := (y value: ((1 plus: 2) plus: (1 plus: 2)))",
+                          "w := ((a plus: 'a&b') plus: (a plus: 'a&b'))"),
+]
+
+def check_share():
+    """
+    Overi, ze --share-nodes da rovnaky navratovy kod a XML (odsadene aj kompaktne)
+    ako bezne parsovanie pre SHARE_PROGRAM a jeho chybne verzie SHARE_BROKEN a ze
+    v SHARE_PROGRAM su zdielane uzly, takze sa prejdu pamatane cesty kontroly aj XML.
+    Vstup kratsi ako SHARE_MIN_SIZE sa parsuje bez zdielania.
+    """
+    import parse25
+    shared = parse25.parse_source(SHARE_PROGRAM, share=True).shared
+    if not shared:
+        print(f"{RED}Shared nodes: FAIL (no shared nodes in the test program){RESET}")
+        return False
+    small = "class Main : Object { run [| x := (1 plus: 2) plus: (1 plus: 2). ] }"
+    if parse25.parse_source(small, share=True).shared is not None:
+        print(f"{RED}Shared nodes: FAIL (input shorter than SHARE_MIN_SIZE shared){RESET}")
+        return False
+    for text in [SHARE_PROGRAM] + SHARE_BROKEN:
+        for extra in ([], ["--compact"]):
+            expected = run_in_process(extra, text)[:2]
+            actual = run_in_process(["--share-nodes"] + extra, text)[:2]
+            if actual != expected:
+                print(f"{RED}Shared nodes: FAIL (RC {actual[0]} vs {expected[0]}"
+                      f"{', XML differs' if actual[0] == expected[0] else ''}){RESET}")
+                return False
+    if [run_in_process([], text)[0] for text in SHARE_BROKEN] != [32] * len(SHARE_BROKEN):
+        print(f"{RED}Shared nodes: FAIL (broken programs not rejected){RESET}")
+        return False
+    print(f"{GREEN}Shared nodes: OK ({len(shared)} shared nodes){RESET}")
+    return True
+
+# Testy kniznicneho rozhrania parse25; kazdy vypise vysledok a vrati True pri uspechu.
+LIBRARY_CHECKS = [check_incremental, check_input, check_formats, check_parallel, check_all_errors,
+                  check_share]
+
+def parse_runner_args(argv):
+    isolated = False
+    workers = os.cpu_count() or 1
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--isolated":
+            isolated = True
+        elif argv[i] == "--workers" and i + 1 < len(argv) and argv[i + 1].isdigit():
+            i += 1
+            workers = max(1, int(argv[i]))
         else:
-            print(f"{GREEN}{name}: OK{RESET}")
-            passed += 1
-    print(f"Parameter tests: {passed}/{total} passed.\n")
-    return passed, total
+            print(__doc__.strip())
+            sys.exit(2)
+        i += 1
+    return isolated, workers
 
 def main():
-    param_passed, param_total = run_param_tests()
-    file_passed, file_total = run_file_tests()
-    total_passed = file_passed + param_passed
-    total_tests = file_total + param_total
+    isolated, workers = parse_runner_args(sys.argv[1:])
+    param_cases = collect_param_tests()
+    file_cases = collect_file_tests()
+    cases = param_cases + file_cases
+
+    start = time.perf_counter()
+    results = run_cases(cases, isolated, workers)
+    wall = time.perf_counter() - start
+
+    print("Parameter tests:")
+    param_passed = sum(report_param_test(case, result)
+                       for case, result in zip(param_cases, results[:len(param_cases)]))
+    param_total = len(param_cases)
+    print(f"Parameter tests: {param_passed}/{param_total} passed.\n")
+
+    print("Startup tests:")
+    startup_passed = int(check_import_budget())
+    startup_total = 1
+    print()
+
+    print("Library tests:")
+    library_passed = sum(check() for check in LIBRARY_CHECKS)
+    library_total = len(LIBRARY_CHECKS)
+    print()
+
+    file_total = len(file_cases)
+    if file_total:
+        print("File-based tests:")
+    file_passed = sum(report_file_test(case, result)
+                      for case, result in zip(file_cases, results[len(param_cases):]))
+    if file_total:
+        print(f"File tests: {file_passed}/{file_total} passed.\n")
+
+    mode = "isolated" if isolated else "in-process"
+    slowest = sorted(zip(cases, results), key=lambda cr: cr[1][3], reverse=True)[:SLOWEST]
+    print(f"Slowest tests ({mode}, {workers} worker(s)):")
+    for case, result in slowest:
+        print(f"  {case['name']}: {result[3] * 1000:.1f} ms")
+    print(f"Wall time: {wall:.3f} s, sum of test times: {sum(r[3] for r in results):.3f} s")
+
+    total_passed = file_passed + param_passed + startup_passed + library_passed
+    total_tests = file_total + param_total + startup_total + library_total
     print("========================================")
     print(f"Total: {total_passed}/{total_tests} tests passed.")
     if total_passed == total_tests: